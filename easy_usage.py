@@ -3,44 +3,34 @@
 
 import os
 import sys
-import time
 
 import ffms2.console_mode
 
 ROOT_DIR = os.path.dirname(sys.argv[0])
-ACCEPTABLE_DELAY = 0.03
 
 
 def main():
+    if "--no-persist" in sys.argv[1:]:
+        # Keep new indexes in memory only, e.g. for files opened once
+        ffms2.set_auto_index_policy(ffms2.AutoIndexPolicy(persist=False))
     source_path = os.path.join(ROOT_DIR, "ffms2", "data", "morning rescue.mkv")
-    now = time.time()
     vs = ffms2.VideoSource(source_path)
-    if vs.index.index_file:
+    if vs.index_origin == "read":
         print(
-            f"The first time you open `{source_path}` ffms2 wrote the index file `{vs.index.index_file}`"
+            f"ffms2 opened `{source_path}` with the index file `{vs.index.index_file}`"
         )
+        print("written the first time it was opened, without indexing again")
+    elif vs.index.index_file:
         print(
-            f"since without it the opening delay was greater then `{ACCEPTABLE_DELAY}`"
+            f"ffms2 {vs.index_origin} `{source_path}` and wrote the index file `{vs.index.index_file}`"
         )
+        print("so that it won’t index it again the next time")
+    elif ffms2.get_auto_index_policy().persist:
+        print(f"ffms2 {vs.index_origin} `{source_path}`")
+        print("but couldn’t write the index file (read-only directory?)")
     else:
-        delay = time.time() - now
-        if (
-            delay > ACCEPTABLE_DELAY
-        ):  # If opening a file has a delay greater than ACCEPTABLE_DELAY, create an index file
-            vs.index.write()
-            print(
-                f"The next time you open `{source_path}` the ffms2 will use the index file `{vs.index.index_file}`"
-            )
-            print(
-                f"since without it the opening delay `{delay}` is greater then `{ACCEPTABLE_DELAY}`"
-            )
-        else:
-            print(
-                f"The next time you open `{source_path}` the ffms2 will not use the index file"
-            )
-            print(
-                f"since even without it the opening delay `{delay}` is less then `{ACCEPTABLE_DELAY}`"
-            )
+        print(f"ffms2 {vs.index_origin} `{source_path}`")
+        print("and kept the index in memory only, since persist is false")
 
 
 if __name__ == "__main__":
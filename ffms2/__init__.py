@@ -18,10 +18,17 @@
 
 import contextlib
 import functools
+import hashlib
+import json
 import math
 import os
+import queue
 import sys
-from collections import namedtuple
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict, namedtuple
 from ctypes import *
 from fractions import Fraction
 
@@ -31,26 +38,43 @@ import numpy
 from .av_log import *
 from .enums import *
 from .libffms2 import *
+from .pix_fmts import *
 
 try:
-    from collections.abc import Iterable, Sized
+    from collections.abc import Iterable, Sequence, Sized
 except ImportError:
-    from collections import Iterable, Sized
+    from collections import Iterable, Sequence, Sized
 
 
 __all__ = [
     "get_version",
     "get_pix_fmt",
+    "get_pix_fmt_desc",
     "get_present_sources",
     "get_enabled_sources",
     "get_log_level",
     "set_log_level",
+    "get_index_cache",
+    "set_index_cache",
+    "get_auto_index_policy",
+    "set_auto_index_policy",
+    "index_many",
     "Error",
     "Indexer",
     "Index",
+    "VideoStreamInfo",
+    "AudioStreamInfo",
+    "IndexCache",
+    "AutoIndexPolicy",
+    "LRUCache",
+    "FrameBuffer",
+    "PixFmtDescriptor",
+    "PlaneDescriptor",
     "VideoSource",
     "AudioSource",
     "FFINDEX_EXT",
+    "STREAM_INFO_EXT",
+    "AUDIO_CACHE_EXT",
     "DEFAULT_AUDIO_FILENAME_FORMAT",
     "FFMS_CH_BACK_CENTER",
     "FFMS_CH_BACK_LEFT",
@@ -161,6 +185,8 @@ __all__ = [
 ]
 
 FFINDEX_EXT = ".ffindex"
+STREAM_INFO_EXT = ".json"
+AUDIO_CACHE_EXT = ".audio"
 DEFAULT_AUDIO_FILENAME_FORMAT = "%sourcefile%_track%trackzn%.w64"
 PIX_FMT_NONE = FFMS_GetPixFmt(b"none")
 
@@ -281,13 +307,56 @@ def set_log_level(level=AV_LOG_QUIET):
     return FFMS_SetLogLevel(level)
 
 
-err_msg = create_string_buffer(1024)
-err_info = FFMS_ErrorInfo(
-    FFMS_ERROR_SUCCESS,
-    FFMS_ERROR_SUCCESS,
-    sizeof(err_msg),
-    cast(err_msg, STRING),
-)
+_index_cache = None
+
+
+def get_index_cache():
+    """Get the index cache used by sources created without an index.
+    """
+    return _index_cache
+
+
+def set_index_cache(index_cache):
+    """Set the index cache used by sources created without an index,
+    or None to only use index files next to source files.
+    """
+    global _index_cache
+    _index_cache = index_cache
+
+
+def get_auto_index_policy():
+    """Get the indexing policy of sources created without an index.
+    """
+    return _auto_index_policy
+
+
+def set_auto_index_policy(policy=None):
+    """Set the indexing policy of sources created without an index,
+    or the default one if policy is None.
+    """
+    global _auto_index_policy
+    _auto_index_policy = policy or AutoIndexPolicy()
+
+
+_thread_local = threading.local()
+
+
+def _get_err_info():
+    """Get the FFMS_ErrorInfo buffer of the calling thread.
+    """
+    try:
+        return _thread_local.err_info
+    except AttributeError:
+        err_msg = create_string_buffer(1024)
+        err_info = FFMS_ErrorInfo(
+            FFMS_ERROR_SUCCESS,
+            FFMS_ERROR_SUCCESS,
+            sizeof(err_msg),
+            cast(err_msg, STRING),
+        )
+        _thread_local.err_msg = err_msg
+        _thread_local.err_info = err_info
+        return err_info
 
 
 class Error(Exception):
@@ -305,11 +374,60 @@ class Error(Exception):
             self.error_type = error_type
             self.sub_type = sub_type
         else:
+            err_info = _get_err_info()
             super().__init__(err_info.Buffer.decode())
             self.error_type = err_info.ErrorType
             self.sub_type = err_info.SubType
 
 
+class LRUCache:
+    """Least recently used cache limited by size in bytes
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        """Return a cached value or None, updating hit and miss counts.
+        """
+        try:
+            value, nbytes = self._items[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, nbytes):
+        """Cache a value, evicting the least recently used ones.
+        """
+        if nbytes > self.max_bytes:
+            return
+        if key in self._items:
+            self.nbytes -= self._items.pop(key)[1]
+        self._items[key] = value, nbytes
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            self.nbytes -= self._items.popitem(last=False)[1][1]
+
+    def clear(self):
+        """Remove all cached values.
+        """
+        self._items.clear()
+        self.nbytes = 0
+
+
 class Indexer:
     """FFMS_Indexer
     """
@@ -321,7 +439,7 @@ class Indexer:
         """Create an indexer object for the given source file.
         """
         self._indexer = FFMS_CreateIndexer(
-            get_encoded_path(source_file), byref(err_info)
+            get_encoded_path(source_file), byref(_get_err_info())
         )
         if not self._indexer:
             raise Error
@@ -377,7 +495,7 @@ class Indexer:
         """
         self._check_indexer()
         index = FFMS_DoIndexing2(
-            self._indexer, error_handling, byref(err_info)
+            self._indexer, error_handling, byref(_get_err_info())
         )
         self._indexer = None
         if not index:
@@ -389,6 +507,36 @@ class Indexer:
             raise ValueError("indexing already done")
 
 
+VideoStreamInfo = namedtuple(
+    "VideoStreamInfo",
+    (
+        "width",
+        "height",
+        "pix_fmt",
+        "sar_num",
+        "sar_den",
+        "fps_num",
+        "fps_den",
+        "first_time",
+        "last_time",
+        "num_frames",
+    ),
+)
+AudioStreamInfo = namedtuple(
+    "AudioStreamInfo",
+    (
+        "sample_rate",
+        "sample_format",
+        "bits_per_sample",
+        "channels",
+        "channel_layout",
+        "first_time",
+        "last_time",
+        "num_samples",
+    ),
+)
+
+
 class Index:
     """FFMS_Index
     """
@@ -399,6 +547,7 @@ class Index:
         self._index = index
         self.index_file = index_file
         self.source_file = source_file
+        self.stream_info = {}
         self._tracks = None
 
     @classmethod
@@ -416,7 +565,7 @@ class Index:
                 raise ValueError(
                     "must provide either index file or source file"
                 )
-            index_file = source_file + FFINDEX_EXT
+            index_file = str(source_file) + FFINDEX_EXT
         # FFMS_ReadIndex() under Windows will hang if index file doesn’t exist.
         # Tested with FFMS 2.17
         if not os.path.isfile(index_file):
@@ -431,28 +580,78 @@ class Index:
                 FFMS_ERROR_PARSER,
                 FFMS_ERROR_FILE_READ,
             )
-        index = FFMS_ReadIndex(get_encoded_path(index_file), byref(err_info))
+        index = FFMS_ReadIndex(
+            get_encoded_path(index_file), byref(_get_err_info())
+        )
         if not index:
             raise Error
         self = cls(index, index_file, source_file)
         if source_file and not self.belongs_to_file(source_file):
             raise Error
+        try:
+            self.stream_info = _read_stream_info(index_file, source_file)
+        except Error:
+            pass
         return self
 
+    @classmethod
+    def read_stream_info(cls, index_file=None, source_file=None):
+        """Read the stream information written along with an index file,
+        without reading the index itself.
+        Return a dict of VideoStreamInfo and AudioStreamInfo by track number.
+        """
+        if not index_file:
+            if not source_file:
+                raise ValueError(
+                    "must provide either index file or source file"
+                )
+            index_file = str(source_file) + FFINDEX_EXT
+        return _read_stream_info(index_file, source_file)
+
     def __del__(self):
         self._FFMS_DestroyIndex(self._index)
 
-    def write(self, index_file=None):
+    def write(self, index_file=None, stream_info=False):
         """Write an index object to disk.
+        If stream_info is true, write the stream information
+        of indexed tracks too (see write_stream_info()).
         """
         if index_file:
             self.index_file = index_file
         elif not self.index_file:
-            self.index_file = self.source_file + FFINDEX_EXT
+            self.index_file = str(self.source_file) + FFINDEX_EXT
         if FFMS_WriteIndex(
-            get_encoded_path(self.index_file), self._index, byref(err_info)
+            get_encoded_path(self.index_file),
+            self._index,
+            byref(_get_err_info()),
         ):
             raise Error
+        if stream_info:
+            self.write_stream_info()
+
+    def write_stream_info(self):
+        """Write the stream information of indexed video and audio tracks
+        next to the index file, so that it can be read back without
+        opening sources.
+        The index file must be written first.
+        """
+        if not self.index_file:
+            raise ValueError("index file not written")
+        for track in self.tracks:
+            if (
+                track.number in self.stream_info
+                or track.type not in (FFMS_TYPE_VIDEO, FFMS_TYPE_AUDIO)
+                or not FFMS_GetNumFrames(track._track)
+            ):
+                continue
+            if not self.source_file:
+                raise ValueError("no source file to get stream info from")
+            source_type = (
+                VideoSource if track.type == FFMS_TYPE_VIDEO else AudioSource
+            )
+            source = source_type(self.source_file, track.number, self)
+            self.stream_info[track.number] = source.stream_info
+        _write_stream_info(self.index_file, self.source_file, self.stream_info)
 
     @property
     def error_handling(self):
@@ -464,7 +663,7 @@ class Index:
         """Get the track number of the first track of a given type.
         """
         track_number = FFMS_GetFirstTrackOfType(
-            self._index, track_type, byref(err_info)
+            self._index, track_type, byref(_get_err_info())
         )
         if track_number < 0:
             raise Error
@@ -474,7 +673,7 @@ class Index:
         """Get the track number of the first indexed track of a given type.
         """
         track_number = FFMS_GetFirstIndexedTrackOfType(
-            self._index, track_type, byref(err_info)
+            self._index, track_type, byref(_get_err_info())
         )
         if track_number < 0:
             raise Error
@@ -498,12 +697,193 @@ class Index:
         """
         return (
             FFMS_IndexBelongsToFile(
-                self._index, get_encoded_path(source_file), byref(err_info)
+                self._index,
+                get_encoded_path(source_file),
+                byref(_get_err_info()),
             )
             == 0
         )
 
 
+def _get_stream_info_header(index_file, source_file):
+    st = os.stat(index_file)
+    header = {"index_size": st.st_size, "index_mtime_ns": st.st_mtime_ns}
+    if source_file:
+        header["source_size"] = os.path.getsize(source_file)
+    return header
+
+
+def _write_stream_info(index_file, source_file, stream_info):
+    tracks = {}
+    for n, info in stream_info.items():
+        track = info._asdict()
+        if isinstance(info, VideoStreamInfo):
+            track["type"] = FFMS_TYPE_VIDEO
+            # Pixel format numbers depend on the FFmpeg version
+            desc = get_pix_fmt_desc(info.pix_fmt)
+            if desc is not None:
+                track["pix_fmt"] = desc.name
+        else:
+            track["type"] = FFMS_TYPE_AUDIO
+        tracks[str(n)] = track
+    data = _get_stream_info_header(index_file, source_file)
+    data["tracks"] = tracks
+    stream_info_file = str(index_file) + STREAM_INFO_EXT
+    temp_file = stream_info_file + ".tmp"
+    with open(temp_file, "w") as f:
+        json.dump(data, f)
+    os.replace(temp_file, stream_info_file)
+
+
+def _read_stream_info(index_file, source_file=None):
+    stream_info_file = str(index_file) + STREAM_INFO_EXT
+    try:
+        with open(stream_info_file) as f:
+            data = json.load(f)
+        header = _get_stream_info_header(index_file, source_file)
+    except (OSError, ValueError) as e:
+        raise Error(
+            "can’t read stream info file {!r}: {}".format(stream_info_file, e),
+            FFMS_ERROR_PARSER,
+            FFMS_ERROR_FILE_READ,
+        )
+    if any(data.get(key) != value for key, value in header.items()):
+        raise Error(
+            "stale stream info file {!r}".format(stream_info_file),
+            FFMS_ERROR_PARSER,
+            FFMS_ERROR_FILE_READ,
+        )
+    stream_info = {}
+    for n, track in data["tracks"].items():
+        track = dict(track)
+        if track.pop("type") == FFMS_TYPE_VIDEO:
+            if isinstance(track["pix_fmt"], str):
+                track["pix_fmt"] = get_pix_fmt(track["pix_fmt"])
+            stream_info[int(n)] = VideoStreamInfo(**track)
+        else:
+            stream_info[int(n)] = AudioStreamInfo(**track)
+    return stream_info
+
+
+def _touch(path):
+    """Mark a cached file as recently used through its access time,
+    keeping its modification time that stream info files depend on.
+    """
+    st = os.stat(path)
+    os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+
+
+class IndexCache:
+    """Directory of index files, keyed by a fingerprint of source files
+    and limited by size in bytes (least recently used files are removed)
+    """
+
+    _SAMPLE_COUNT = 16
+    _SAMPLE_SIZE = 1 << 16
+    # Files of a cache entry, named after the fingerprint of its source file
+    _ENTRY_EXTS = (FFINDEX_EXT, FFINDEX_EXT + STREAM_INFO_EXT, AUDIO_CACHE_EXT)
+
+    def __init__(self, path, max_bytes=None):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        os.makedirs(self.path, exist_ok=True)
+
+    def get_fingerprint(self, source_file):
+        """Get a fingerprint of a source file from its size, its mtime
+        and a hash of sampled blocks.
+        """
+        st = os.stat(source_file)
+        h = hashlib.blake2b(digest_size=20)
+        h.update("{}:{}".format(st.st_size, st.st_mtime_ns).encode())
+        with open(source_file, "rb") as f:
+            if st.st_size <= self._SAMPLE_COUNT * self._SAMPLE_SIZE:
+                h.update(f.read())
+            else:
+                step = (st.st_size - self._SAMPLE_SIZE) // (
+                    self._SAMPLE_COUNT - 1
+                )
+                for i in range(self._SAMPLE_COUNT):
+                    f.seek(i * step)
+                    h.update(f.read(self._SAMPLE_SIZE))
+        return h.hexdigest()
+
+    def get_index_file(self, source_file):
+        """Get the cache path of the index file of a source file.
+        """
+        return os.path.join(
+            self.path, self.get_fingerprint(source_file) + FFINDEX_EXT
+        )
+
+    def get(self, source_file):
+        """Return the cached index file of a source file, or None.
+        """
+        index_file = self.get_index_file(source_file)
+        try:
+            _touch(index_file)
+        except FileNotFoundError:
+            return None
+        return index_file
+
+    def put(self, source_file, index):
+        """Write an index to the cache, then remove the least recently
+        used index files over the size limit.
+        """
+        index_file = self.get_index_file(source_file)
+        fd, temp_file = tempfile.mkstemp(FFINDEX_EXT + ".tmp", "", self.path)
+        os.close(fd)
+        try:
+            index.write(temp_file)
+            os.replace(temp_file, index_file)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temp_file)
+            raise
+        index.index_file = index_file
+        self.evict()
+        return index_file
+
+    def evict(self, max_bytes=None):
+        """Remove the least recently used entries (index files and the
+        files stored along with them) until the cache is no larger than
+        max_bytes (or its limit).
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        if max_bytes is None:
+            return
+        entries = {}
+        nbytes = 0
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(self._ENTRY_EXTS):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            fingerprint = entry.name.partition(".")[0].partition("_")[0]
+            atime, size, paths = entries.get(fingerprint, (0, 0, []))
+            paths.append(entry.path)
+            entries[fingerprint] = (
+                max(atime, st.st_atime_ns),
+                size + st.st_size,
+                paths,
+            )
+            nbytes += st.st_size
+        for _, size, paths in sorted(entries.values()):
+            if nbytes <= max_bytes:
+                break
+            for path in paths:
+                # e.g. still mapped under Windows
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+            nbytes -= size
+
+    def clear(self):
+        """Remove all cached files.
+        """
+        self.evict(0)
+
+
 class VideoType:
     type = FFMS_TYPE_VIDEO  # @ReservedAssignment
 
@@ -512,46 +892,209 @@ class AudioType:
     type = FFMS_TYPE_AUDIO  # @ReservedAssignment
 
 
+def _get_indexed_tracks(index):
+    return tuple(
+        track.number
+        for track in index.tracks
+        if FFMS_GetNumFrames(track._track)
+    )
+
+
+class _IndexRegistry:
+    """Indexes used by sources created without an index,
+    shared while they’re alive, by file and indexed tracks
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = weakref.WeakValueDictionary()
+        self._loading = {}
+
+    def get(self, source_file, find, load):
+        """Return an index of a source file and a value found in it
+        by find(index), or else by load() (returning both).
+        Only one index of a file is loaded at a time:
+        other threads wait for it before looking again.
+        """
+        try:
+            st = os.stat(source_file)
+        except OSError:
+            return load()
+        file_key = os.path.realpath(source_file), st.st_mtime_ns, st.st_size
+        while True:
+            with self._lock:
+                for (key, _), index in list(self._indexes.items()):
+                    if key == file_key:
+                        value = find(index)
+                        if value is not None:
+                            return index, value
+                loaded = self._loading.get(file_key)
+                if loaded is None:
+                    loaded = self._loading[file_key] = threading.Event()
+                    break
+            loaded.wait()
+        try:
+            index, value = load()
+            with self._lock:
+                self._indexes[file_key, _get_indexed_tracks(index)] = index
+            return index, value
+        finally:
+            with self._lock:
+                del self._loading[file_key]
+            loaded.set()
+
+
+_index_registry = _IndexRegistry()
+
+
+def _find_track(index, track_type, track_number=None):
+    """Return the number of the requested track, or of the first
+    indexed track of a given type, or None if it isn’t indexed.
+    """
+    if track_number is None:
+        try:
+            return index.get_first_indexed_track_of_type(track_type)
+        except Error:
+            return None
+    if 0 <= track_number < len(index.tracks) and FFMS_GetNumFrames(
+        index.tracks[track_number]._track
+    ):
+        return track_number
+    return None
+
+
+class AutoIndexPolicy:
+    """Indexing policy of sources created without an index.
+    A requested track is indexed along with the video and audio tracks
+    selected by video and audio: "requested" (none), "first" or "all".
+    An existing index lacking the requested track is indexed again
+    with the tracks it already had.
+    New indexes are written to the index cache if one is set,
+    or else next to source files unless persist is false
+    (write errors, e.g. on read-only mounts, are ignored).
+    """
+
+    _SELECTIONS = ["requested", "first", "all"]
+
+    def __init__(
+        self,
+        video="first",
+        audio="all",
+        persist=True,
+        error_handling=FFMS_IEH_STOP_TRACK,
+    ):
+        for selection in [video, audio]:
+            if selection not in self._SELECTIONS:
+                raise ValueError(
+                    "invalid track selection: {!r}".format(selection)
+                )
+        self.video = video
+        self.audio = audio
+        self.persist = persist
+        self.error_handling = error_handling
+
+    def select_tracks(self, track_info_list, track_number):
+        """Return the set of track numbers to index along with
+        a requested one (if any).
+        """
+        tracks = set() if track_number is None else {track_number}
+        for track_type, selection in [
+            (FFMS_TYPE_VIDEO, self.video),
+            (FFMS_TYPE_AUDIO, self.audio),
+        ]:
+            numbers = [t.num for t in track_info_list if t.type == track_type]
+            if selection == "all":
+                tracks.update(numbers)
+            elif selection == "first":
+                tracks.update(numbers[:1])
+        return tracks
+
+    def load_index(self, source_file, track_type, track_number=None):
+        """Return an index with the requested track (or the first track of
+        track_type) indexed, the track number, and how the index was
+        obtained: "read", "reindexed" or "indexed".
+        """
+        try:
+            index_file = None
+            if _index_cache is not None:
+                index_file = _index_cache.get(source_file)
+            index = Index.read(index_file, source_file)
+        except Error:
+            index = None
+        else:
+            found_track_number = _find_track(index, track_type, track_number)
+            if found_track_number is not None:
+                return index, found_track_number, "read"
+
+        indexer = Indexer(source_file)
+        if track_number is None:
+            for track in indexer.track_info_list:
+                if track.type == track_type:
+                    break
+            else:
+                raise Error(
+                    "no suitable track",
+                    FFMS_ERROR_INDEX,
+                    FFMS_ERROR_NOT_AVAILABLE,
+                )
+            track_number = track.num
+        tracks = self.select_tracks(indexer.track_info_list, track_number)
+        if index is None:
+            how = "indexed"
+        else:
+            how = "reindexed"
+            tracks.update(_get_indexed_tracks(index))
+        for track in indexer.track_info_list:
+            indexer.track_index_settings(track.num, track.num in tracks, 0)
+        index = indexer.do_indexing2(self.error_handling)
+
+        if _index_cache is not None:
+            _index_cache.put(source_file, index)
+        elif self.persist:
+            try:
+                index.write()
+            except (Error, OSError):
+                # e.g. read-only directory
+                index.index_file = None
+        return index, track_number, how
+
+
+_auto_index_policy = AutoIndexPolicy()
+
+
 class Source:
     def __init__(self, source_file, track_number=None, index=None):
+        """index_origin tells how the index was obtained: "given",
+        "shared" with another source, or as reported by the
+        auto-indexing policy.
+        """
+        self.index_origin = "given"
         if not index:
-            try:
-                index = Index.read(source_file=source_file)
-                if track_number is None:
-                    track_number = index.get_first_indexed_track_of_type(
-                        self.type
-                    )
-                elif not index.tracks[track_number].frame_info_list:
-                    index = None
-            except Error:
-                index = None
-            if not index:
-                indexer = Indexer(source_file)
-
-                if track_number is None:
-                    for track in indexer.track_info_list:
-                        if track.type == self.type:
-                            break
-                    else:
-                        raise Error(
-                            "no suitable track",
-                            FFMS_ERROR_INDEX,
-                            FFMS_ERROR_NOT_AVAILABLE,
-                        )
-                    track_number = track.num
-
-                for track in indexer.track_info_list:
-                    indexer.track_index_settings(
-                        track.num, track_number == track.num, 0
-                    )
-
-                index = indexer.do_indexing2()
+            index, (track_number, self.index_origin) = _index_registry.get(
+                source_file,
+                functools.partial(self._find_shared_track, track_number),
+                functools.partial(self._load_index, source_file, track_number),
+            )
         elif track_number is None:
             track_number = index.get_first_indexed_track_of_type(self.type)
         self.track_number = track_number
         self.index = index
         self._track = None
 
+    @classmethod
+    def _find_shared_track(cls, track_number, index):
+        track_number = _find_track(index, cls.type, track_number)
+        if track_number is None:
+            return None
+        return track_number, "shared"
+
+    @classmethod
+    def _load_index(cls, source_file, track_number):
+        index, track_number, how = _auto_index_policy.load_index(
+            source_file, cls.type, track_number
+        )
+        return index, (track_number, how)
+
 
 class VideoSource(VideoType, Source):
     """FFMS_VideoSource
@@ -566,8 +1109,15 @@ class VideoSource(VideoType, Source):
         index=None,
         num_threads=0,
         seek_mode=FFMS_SEEK_NORMAL,
+        cache_size=0,
+        copy_on_invalidate=False,
     ):
         """Create a video source object.
+        A frame cache of cache_size bytes is used if cache_size > 0.
+        If copy_on_invalidate is true, the last returned frame is copied
+        before being overwritten if it’s still referenced. Only the frame
+        object is preserved: planes and arrays taken from it before still
+        view decoder memory.
         """
         super().__init__(source_file, track_number, index)
         # GetNumberOfLogicalCPUs() if Threads < 1
@@ -578,36 +1128,216 @@ class VideoSource(VideoType, Source):
             self.index._index,
             self.num_threads,
             seek_mode,
-            byref(err_info),
+            byref(_get_err_info()),
         )
         if not self._source:
             raise Error
         self.properties = FFMS_GetVideoProperties(self._source)[0]
+        self.frame_cache = LRUCache(cache_size) if cache_size > 0 else None
+        self._output_format = None
+        self._input_format = None
+        self._native_format = None
+        info = self.index.stream_info.get(self.track_number)
+        if isinstance(info, VideoStreamInfo) and info.pix_fmt >= 0:
+            self._native_format = info.width, info.height, info.pix_fmt
+        self.copy_on_invalidate = copy_on_invalidate
+        self._generation = 0
+        self._weakref = weakref.ref(self)
+        self._borrowed_frame = None
 
     def __del__(self):
         self._FFMS_DestroyVideoSource(self._source)
 
     def get_frame(self, n):
         """Retrieve a given video frame.
+        Cached frames own their data and are shared between calls.
         """
-        frame = FFMS_GetFrame(self._source, n, byref(err_info))
+        if self.frame_cache is None:
+            return self._get_frame(n)
+        key = n, self._output_format, self._input_format
+        frame = self.frame_cache.get(key)
+        if frame is None:
+            frame = self._get_frame(n).copy()
+            self.frame_cache.put(key, frame, frame.nbytes)
+        return frame
+
+    def _get_frame(self, n):
+        self._invalidate_frames()
+        frame = FFMS_GetFrame(self._source, n, byref(_get_err_info()))
         if not frame:
             # HACK: Seems to fail sometimes. Fixed by retrying…
-            frame = FFMS_GetFrame(self._source, n, byref(err_info))
+            frame = FFMS_GetFrame(self._source, n, byref(_get_err_info()))
             if not frame:
                 raise Error
-        return frame[0]
+        return self._borrow_frame(frame[0])
+
+    def _invalidate_frames(self):
+        """Mark frames borrowed from the decoder as invalid,
+        or copy the last one if copy_on_invalidate is set
+        (views already taken from it can’t be repointed).
+        """
+        if self._borrowed_frame is not None:
+            frame = self._borrowed_frame()
+            self._borrowed_frame = None
+            if frame is not None and frame._generation == self._generation:
+                _own_frame_data(frame)
+        self._generation += 1
+
+    def _borrow_frame(self, frame):
+        frame = FFMS_Frame.from_buffer_copy(frame)
+        if self._native_format is None:
+            self._native_format = (
+                frame.EncodedWidth,
+                frame.EncodedHeight,
+                frame.EncodedPixelFormat,
+            )
+        frame._source = self._weakref
+        frame._generation = self._generation
+        if self.copy_on_invalidate:
+            self._borrowed_frame = weakref.ref(frame)
+        return frame
+
+    def get_frames(self, frame_numbers, out=None):
+        """Retrieve several video frames as stacked planes.
+        Frames are decoded in ascending order, so that each keyframe
+        group is decoded in one forward pass, and duplicates only once.
+        Returns an array of shape (len(frame_numbers),) + plane shape,
+        or a list of such arrays for planar formats.
+        """
+        frame_numbers = numpy.asarray(frame_numbers, numpy.int64)
+        if frame_numbers.ndim != 1:
+            raise ValueError("frame numbers must be one-dimensional")
+        if out is not None and not isinstance(out, (list, tuple)):
+            out = [out]
+        prev_n = prev_i = None
+        for i in numpy.argsort(frame_numbers, kind="stable"):
+            n = frame_numbers[i]
+            if n == prev_n:
+                for a in out:
+                    a[i] = a[prev_i]
+                continue
+            planes = _get_used_planes(self.get_frame(int(n)))
+            if out is None:
+                out = [
+                    numpy.empty((len(frame_numbers),) + p.shape, p.dtype)
+                    for p in planes
+                ]
+            elif prev_n is None:
+                _check_planes(out, planes, len(frame_numbers))
+            for a, p in zip(out, planes):
+                a[i] = p
+            prev_n, prev_i = n, i
+        if out is None:
+            return []
+        return out[0] if len(out) == 1 else out
+
+    def iter_frames(self, start=0, stop=None, step=1, prefetch=2):
+        """Return an iterator over the planes of a range of frames.
+        Frames are decoded on a background thread, up to prefetch frames
+        ahead, into a ring of reused buffers: yielded planes are only
+        valid until the next iteration, and the source must not be used
+        otherwise while iterating.
+        """
+        if stop is None:
+            stop = self.properties.NumFrames
+        frame_numbers = range(start, stop, step)
+        with contextlib.closing(
+            _read_ahead(frame_numbers, self._fill_frame_buffer, prefetch + 1)
+        ) as buffers:
+            for buffer in buffers:
+                planes = buffer.planes
+                yield planes[0] if len(planes) == 1 else planes
+
+    def get_frame_into(self, n, out):
+        """Retrieve a given video frame and copy its planes into out,
+        a FrameBuffer or a list of arrays. Returns out.
+        """
+        frame = self.get_frame(n)
+        if isinstance(out, FrameBuffer):
+            out.copy_from(frame)
+        else:
+            FrameBuffer(out).copy_from(frame)
+        return out
+
+    def _fill_frame_buffer(self, n, buffer):
+        frame = self.get_frame(n)
+        if buffer is not None:
+            try:
+                buffer.copy_from(frame)
+                return buffer
+            except ValueError:
+                pass
+        buffer = FrameBuffer.like(frame)
+        buffer.copy_from(frame)
+        return buffer
+
+    def iter_keyframes(self, every_seconds=None):
+        """Return an iterator over (frame number, frame) of keyframes.
+        With every_seconds, only the keyframe nearest to each multiple of
+        every_seconds is decoded.
+        """
+        for n in self._get_keyframe_numbers(every_seconds):
+            yield n, self.get_frame(n)
+
+    def get_thumbnails(
+        self,
+        every_seconds=None,
+        width=None,
+        height=None,
+        target_formats=None,
+        resizer=FFMS_RESIZER_BICUBIC,
+    ):
+        """Decode scaled keyframes, as selected by iter_keyframes().
+        Returns the frame numbers and the planes stacked like get_frames().
+        """
+        frame_numbers = self._get_keyframe_numbers(every_seconds)
+        # Cached frames are keyed by output format: keep them
+        output_format = self._output_format
+        self._set_output_format(target_formats, width, height, resizer)
+        try:
+            return frame_numbers, self.get_frames(frame_numbers)
+        finally:
+            if output_format is None:
+                FFMS_ResetOutputFormatV(self._source)
+                self._output_format = None
+                self._invalidate_frames()
+            else:
+                self._set_output_format(*output_format)
+
+    def _get_keyframe_numbers(self, every_seconds):
+        if every_seconds is None:
+            return self.track.keyframes
+        if every_seconds <= 0:
+            raise ValueError("every_seconds must be positive")
+        times = numpy.arange(
+            self.properties.FirstTime,
+            self.properties.LastTime + every_seconds / 2,
+            every_seconds,
+        )
+        return self.track.get_nearest_keyframes(times * 1000)
 
     def get_frame_by_time(self, time):
         """Retrieve a video frame at a given timestamp.
         (Closest frame from PTS)
         """
-        frame = FFMS_GetFrameByTime(self._source, time, byref(err_info))
+        self._invalidate_frames()
+        frame = FFMS_GetFrameByTime(self._source, time, byref(_get_err_info()))
         if not frame:
-            frame = FFMS_GetFrameByTime(self._source, time, byref(err_info))
+            frame = FFMS_GetFrameByTime(
+                self._source, time, byref(_get_err_info())
+            )
             if not frame:
                 raise Error
-        return frame[0]
+        return self._borrow_frame(frame[0])
+
+    def get_frames_by_time(self, times, out=None):
+        """Retrieve the video frames at given timestamps as stacked planes.
+        Timestamps are resolved to the closest frames like
+        get_frame_by_time(), then decoded like get_frames().
+        """
+        times = numpy.asarray(times, numpy.float64)
+        frame_numbers = self.track.frame_at_time(times * 1000, closest=True)
+        return self.get_frames(frame_numbers, out)
 
     def set_output_format(
         self,
@@ -617,30 +1347,40 @@ class VideoSource(VideoType, Source):
         resizer=FFMS_RESIZER_BICUBIC,
     ):
         """Set the output format for video frames.
+        Unspecified values are kept from the current output format,
+        or else taken from the native format.
         """
-        frame = self.get_frame(0)
+        self._set_output_format(target_formats, width, height, resizer)
+        self._format_changed()
+
+    def _set_output_format(
+        self,
+        target_formats=None,
+        width=None,
+        height=None,
+        resizer=FFMS_RESIZER_BICUBIC,
+    ):
+        if self._output_format is not None:
+            (
+                current_formats,
+                current_width,
+                current_height,
+            ) = self._output_format[:3]
+        else:
+            current_formats = [self.native_pix_fmt]
+            current_width, current_height = self.native_size
         if target_formats is None:
-            target_formats = [
-                frame.ConvertedPixelFormat
-                if frame.ConvertedPixelFormat > 0
-                else frame.EncodedPixelFormat
-            ]
+            target_formats = list(current_formats)
         elif isinstance(target_formats, int):
             target_formats = mask_to_list(target_formats)
+        else:
+            target_formats = list(target_formats)
         if target_formats[-1] >= 0:
             target_formats.append(-1)
         if width is None:
-            width = (
-                frame.ScaledWidth
-                if frame.ScaledWidth > 0
-                else frame.EncodedWidth
-            )
+            width = current_width
         if height is None:
-            height = (
-                frame.ScaledHeight
-                if frame.ScaledHeight > 0
-                else frame.EncodedHeight
-            )
+            height = current_height
         r = FFMS_SetOutputFormatV2(
             self._source,
             cast(
@@ -649,15 +1389,19 @@ class VideoSource(VideoType, Source):
             width,
             height,
             resizer,
-            byref(err_info),
+            byref(_get_err_info()),
         )
         if r:
             raise Error
+        self._output_format = tuple(target_formats), width, height, resizer
+        self._invalidate_frames()
 
     def reset_output_format(self):
         """Reset the video output format.
         """
         FFMS_ResetOutputFormatV(self._source)
+        self._output_format = None
+        self._format_changed()
 
     @contextlib.contextmanager
     def output_format(
@@ -686,15 +1430,24 @@ class VideoSource(VideoType, Source):
             color_space,
             color_range,
             pixel_format,
-            byref(err_info),
+            byref(_get_err_info()),
         )
         if r:
             raise Error
+        self._input_format = color_space, color_range, pixel_format
+        self._format_changed()
 
     def reset_input_format(self):
         """Reset the video input format.
         """
         FFMS_ResetInputFormatV(self._source)
+        self._input_format = None
+        self._format_changed()
+
+    def _format_changed(self):
+        self._invalidate_frames()
+        if self.frame_cache is not None:
+            self.frame_cache.clear()
 
     @contextlib.contextmanager
     def input_format(
@@ -709,6 +1462,54 @@ class VideoSource(VideoType, Source):
         yield
         self.reset_input_format()
 
+    def _get_native_format(self):
+        if self._native_format is None:
+            # Encoded values are the same for every frame
+            self._get_frame(0)
+        return self._native_format
+
+    @property
+    def native_size(self):
+        """Encoded frame width and height
+        """
+        return self._get_native_format()[:2]
+
+    @property
+    def native_width(self):
+        """Encoded frame width
+        """
+        return self._get_native_format()[0]
+
+    @property
+    def native_height(self):
+        """Encoded frame height
+        """
+        return self._get_native_format()[1]
+
+    @property
+    def native_pix_fmt(self):
+        """Encoded pixel format
+        """
+        return self._get_native_format()[2]
+
+    @property
+    def stream_info(self):
+        """Stream information
+        """
+        p = self.properties
+        return VideoStreamInfo(
+            self.native_width,
+            self.native_height,
+            self.native_pix_fmt,
+            p.SARNum,
+            p.SARDen,
+            p.FPSNumerator,
+            p.FPSDenominator,
+            p.FirstTime,
+            p.LastTime,
+            p.NumFrames,
+        )
+
     @property
     def track(self):
         """Track from video source
@@ -722,24 +1523,269 @@ class VideoSource(VideoType, Source):
         return self._track
 
 
-def _get_planes(frame):
+def _get_pix_fmt(frame):
+    return (
+        frame.ConvertedPixelFormat
+        if frame.ConvertedPixelFormat >= 0
+        else frame.EncodedPixelFormat
+    )
+
+
+def _get_plane_layouts(frame):
+    """Return the shape, dtype, strides and size in bytes of each plane.
+    Planes of unknown pixel formats are flat arrays of bytes.
+    """
+    width = frame.ScaledWidth if frame.ScaledWidth > 0 else frame.EncodedWidth
     height = (
         frame.ScaledHeight if frame.ScaledHeight > 0 else frame.EncodedHeight
     )
+    desc = get_pix_fmt_desc(_get_pix_fmt(frame))
+    if desc is None:
+        return [
+            (
+                (linesize * height,),
+                numpy.dtype(numpy.uint8),
+                None,
+                linesize * height,
+            )
+            for linesize in frame.Linesize
+        ]
+    dtype = numpy.dtype(desc.dtype)
+    layouts = []
+    for n, linesize in enumerate(frame.Linesize):
+        if n >= len(desc.planes) or not linesize:
+            layouts.append(((0,), dtype, None, 0))
+            continue
+        plane = desc.planes[n]
+        w, h = width, height
+        if plane.subsampled:
+            w = -(-w >> desc.log2_chroma_w)
+            h = -(-h >> desc.log2_chroma_h)
+        row_size = w * plane.components * dtype.itemsize
+        if plane.components == 1:
+            shape = h, w
+            strides = linesize, dtype.itemsize
+        else:
+            shape = h, w, plane.components
+            strides = (
+                linesize,
+                plane.components * dtype.itemsize,
+                dtype.itemsize,
+            )
+        layouts.append((shape, dtype, strides, linesize * (h - 1) + row_size))
+    return layouts
+
+
+def _get_plane_sizes(frame):
+    return [size for _, _, _, size in _get_plane_layouts(frame)]
+
+
+def _get_planes(frame):
+    _check_valid(frame)
+    # Views of owned data keep it alive, unlike views of the pointers
+    buffers = getattr(frame, "_buffers", None)
     return [
-        numpy.frombuffer(
-            cast(frame.Data[n], POINTER(frame.Linesize[n] * height * c_uint8))[
-                0
-            ],
-            numpy.uint8,
+        numpy.ndarray(
+            shape,
+            dtype,
+            buffers[n]
+            if buffers is not None
+            else cast(frame.Data[n], POINTER(size * c_uint8))[0],
+            strides=strides,
+        )
+        if size
+        else numpy.empty(shape, dtype)
+        for n, (shape, dtype, strides, size) in enumerate(
+            _get_plane_layouts(frame)
         )
-        if frame.Linesize[n]
-        else numpy.empty((0,), numpy.uint8)
-        for n in range(len(frame.Data))
     ]
 
 
+def _read_ahead(items, fill, num_buffers):
+    """Yield the results of fill(item, buffer) for each item.
+    fill() runs on a background thread, up to num_buffers - 1 items ahead
+    of the caller, and is given a buffer to reuse (None at first) that
+    was previously returned by it and already handed to the caller.
+    A yielded buffer is reused once the caller asks for the next one.
+    """
+    free = queue.Queue()
+    filled = queue.Queue()
+    stop = threading.Event()
+    for _ in range(max(num_buffers, 1)):
+        free.put(None)
+
+    def run():
+        try:
+            for item in items:
+                buffer = free.get()
+                if stop.is_set():
+                    return
+                filled.put((True, fill(item, buffer)))
+        except BaseException as e:
+            filled.put((False, e))
+        else:
+            filled.put((False, None))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while True:
+            ok, value = filled.get()
+            if not ok:
+                if value is not None:
+                    raise value
+                return
+            yield value
+            free.put(value)
+    finally:
+        stop.set()
+        free.put(None)
+        thread.join()
+
+
+def _get_used_planes(frame):
+    return [plane for plane in frame.planes if plane.size]
+
+
+def _check_planes(arrays, planes, count=None):
+    if len(arrays) != len(planes):
+        raise ValueError(
+            "expected {} arrays, got {}".format(len(planes), len(arrays))
+        )
+    for a, p in zip(arrays, planes):
+        shape = p.shape if count is None else (count,) + p.shape
+        if a.shape != shape or a.dtype != p.dtype:
+            raise ValueError(
+                "expected array of shape {} and type {}, "
+                "got {} and {}".format(shape, p.dtype, a.shape, a.dtype)
+            )
+
+
+def _get_nbytes(frame):
+    return sum(_get_plane_sizes(frame))
+
+
+def _copy_frame(frame):
+    """Copy a frame into memory owned by the returned frame.
+    """
+    _check_valid(frame)
+    copy = FFMS_Frame.from_buffer_copy(frame)
+    _own_frame_data(copy)
+    return copy
+
+
+def _own_frame_data(frame):
+    """Copy the planes of a frame into memory owned by it.
+    """
+    buffers = []
+    for n, size in enumerate(_get_plane_sizes(frame)):
+        buf = None
+        if size:
+            buf = numpy.empty((size,), numpy.uint8)
+            memmove(buf.ctypes.data, frame.Data[n], size)
+            frame.Data[n] = buf.ctypes.data_as(POINTER(c_uint8))
+        buffers.append(buf)
+    frame._buffers = buffers
+    frame._source = None
+
+
+def _is_valid(frame):
+    source = getattr(frame, "_source", None)
+    if source is None:
+        return True
+    source = source()
+    return source is not None and source._generation == frame._generation
+
+
+def _check_valid(frame):
+    if not _is_valid(frame):
+        raise ValueError(
+            "frame was invalidated by a later call to its video source"
+        )
+
+
+def _get_array(frame):
+    # FFMS_Frame is a ctypes structure, so its own buffer is the structure:
+    # export this array to buffer protocol or __array_interface__ consumers
+    planes = _get_used_planes(frame)
+    if len(planes) != 1:
+        raise ValueError(
+            "frame has {} planes, use planes or "
+            "a packed output format".format(len(planes))
+        )
+    return planes[0]
+
+
+def _tobytes(frame):
+    return frame.array.tobytes()
+
+
+def _dlpack(frame, *args, **kwargs):
+    return frame.array.__dlpack__(*args, **kwargs)
+
+
+def _dlpack_device(frame):
+    return frame.array.__dlpack_device__()
+
+
+FFMS_Frame.pix_fmt = property(_get_pix_fmt)
 FFMS_Frame.planes = property(_get_planes)
+FFMS_Frame.nbytes = property(_get_nbytes)
+FFMS_Frame.copy = _copy_frame
+FFMS_Frame.valid = property(_is_valid)
+FFMS_Frame.array = property(_get_array)
+FFMS_Frame.tobytes = _tobytes
+FFMS_Frame.__dlpack__ = _dlpack
+FFMS_Frame.__dlpack_device__ = _dlpack_device
+
+
+class FrameBuffer:
+    """Reusable arrays to copy the planes of video frames into
+    """
+
+    _MAX_VIEWS = 8
+    _LAYOUT_SIZE = FFMS_Frame.KeyFrame.offset
+
+    def __init__(self, planes):
+        self.planes = list(planes)
+        self._views = {}
+
+    @classmethod
+    def like(cls, frame):
+        """Allocate a frame buffer matching the planes of a frame.
+        """
+        return cls(numpy.empty_like(p) for p in _get_used_planes(frame))
+
+    @property
+    def nbytes(self):
+        """Size of the planes in bytes
+        """
+        return sum(plane.nbytes for plane in self.planes)
+
+    def copy_from(self, frame):
+        """Copy the planes of a frame.
+        Plane views are checked once and reused for frames with the same
+        buffers and layout, so that copying doesn’t allocate memory.
+        Frames owning their data are copied from their planes instead,
+        since their buffers change from one frame to the next.
+        """
+        _check_valid(frame)
+        if getattr(frame, "_buffers", None) is not None:
+            planes = _get_used_planes(frame)
+            _check_planes(self.planes, planes)
+            for plane, view in zip(self.planes, planes):
+                numpy.copyto(plane, view)
+            return
+        layout = string_at(addressof(frame), self._LAYOUT_SIZE)
+        views = self._views.get(layout)
+        if views is None:
+            views = _get_used_planes(frame)
+            _check_planes(self.planes, views)
+            if len(self._views) >= self._MAX_VIEWS:
+                self._views.clear()
+            self._views[layout] = views
+        for plane, view in zip(self.planes, views):
+            numpy.copyto(plane, view)
 
 
 def _get_fps(properties):
@@ -764,6 +1810,9 @@ class AudioSource(AudioType, Source):
     """
 
     _DEFAULT_RATE = 100
+    _CACHE_BLOCK_SIZE = 1 << 14
+    _MATERIALIZE_BLOCK_SIZE = 1 << 18
+    _TEMP_CACHE_MAX_BYTES = 4 << 30
     _SAMPLE_TYPES = [
         numpy.uint8,
         numpy.int16,
@@ -779,8 +1828,12 @@ class AudioSource(AudioType, Source):
         track_number=None,
         index=None,
         delay_mode=FFMS_DELAY_FIRST_VIDEO_TRACK,
+        cache_size=0,
+        cache_block_size=_CACHE_BLOCK_SIZE,
     ):
         """Create an audio source object.
+        An audio cache of cache_size bytes, by aligned blocks of
+        cache_block_size samples, is used if cache_size > 0.
         """
         super().__init__(source_file, track_number, index)
         self._source = FFMS_CreateAudioSource(
@@ -788,12 +1841,16 @@ class AudioSource(AudioType, Source):
             self.track_number,
             self.index._index,
             delay_mode,
-            byref(err_info),
+            byref(_get_err_info()),
         )
         if not self._source:
             raise Error
         self.properties = FFMS_GetAudioProperties(self._source)[0]
         self.sample_type = self._SAMPLE_TYPES[self.properties.SampleFormat]
+        self.audio_cache = LRUCache(cache_size) if cache_size > 0 else None
+        self.cache_block_size = cache_block_size
+        self.delay_mode = delay_mode
+        self._materialized = None
 
     def __del__(self):
         self._FFMS_DestroyAudioSource(self._source)
@@ -807,21 +1864,267 @@ class AudioSource(AudioType, Source):
         )
         self.buf = self.audio.ctypes.data_as(c_void_p)
 
-    def get_audio(self, start):
+    def get_audio(self, start, count=None):
         """Decode a number of audio samples.
+        If count is None, decode init_buffer() samples into the shared
+        buffer, else decode count samples into a new array
+        (or return a read-only view once the track is materialized).
         """
+        if count is not None:
+            materialized = self._materialized
+            if (
+                materialized is not None
+                and start >= 0
+                and start + count <= len(materialized)
+            ):
+                return materialized[start : start + count]
+            audio = numpy.empty(
+                (count, self.properties.Channels), self.sample_type
+            )
+            return self.get_audio_into(start, audio)
         # FFMS 2.17: ReadPacket error or even core dump
         # for random accesses under Linux?
-        if FFMS_GetAudio(
-            self._source, self.buf, start, self.count, byref(err_info)
+        self._get_audio(start, self.audio)
+        return self.audio
+
+    def get_audio_into(self, start, out):
+        """Decode audio samples into a C-contiguous array or buffer
+        of the sample type, of shape (count, channels) or (count * channels,).
+        Returns out.
+        """
+        audio = numpy.asarray(out)
+        channels = self.properties.Channels
+        if (
+            audio.dtype != self.sample_type
+            or not audio.flags.c_contiguous
+            or not audio.flags.writeable
+            or not (
+                audio.ndim == 2
+                and audio.shape[1] == channels
+                or audio.ndim == 1
+                and audio.size % channels == 0
+            )
+        ):
+            raise ValueError(
+                "expected a writeable C-contiguous array of {} "
+                "and shape (count, {}), got {} {}".format(
+                    numpy.dtype(self.sample_type),
+                    channels,
+                    audio.dtype,
+                    audio.shape,
+                )
+            )
+        self._get_audio(start, audio.reshape(-1, channels))
+        return out
+
+    def _get_audio(self, start, audio):
+        count = len(audio)
+        materialized = self._materialized
+        if (
+            materialized is not None
+            and materialized.dtype == audio.dtype
+            and start >= 0
+            and start + count <= len(materialized)
+        ):
+            audio[:] = materialized[start : start + count]
+        elif (
+            self.audio_cache is None
+            or start < 0
+            or start + count > self.properties.NumSamples
+        ):
+            self._decode_audio(start, audio)
+        elif count:
+            self._get_cached_audio(start, audio)
+
+    def _decode_audio(self, start, audio):
+        if len(audio) and FFMS_GetAudio(
+            self._source,
+            audio.ctypes.data_as(c_void_p),
+            start,
+            len(audio),
+            byref(_get_err_info()),
         ):
             raise Error
-        return self.audio
 
-    def linear_access(self, start=0, end=None, rate=_DEFAULT_RATE):
+    def _get_cached_audio(self, start, audio):
+        """Copy samples from cached blocks into audio, decoding missing
+        blocks first in ascending order, consecutive ones at once.
+        """
+        size = self.cache_block_size
+        end = start + len(audio)
+        block_numbers = range(start // size, (end - 1) // size + 1)
+        blocks = {}
+        missing = []
+        for b in block_numbers:
+            block = self.audio_cache.get(b)
+            if block is None:
+                missing.append(b)
+            else:
+                blocks[b] = block
+        while missing:
+            first = last = missing.pop(0)
+            while missing and missing[0] == last + 1:
+                last = missing.pop(0)
+            run_start = first * size
+            run_end = min((last + 1) * size, self.properties.NumSamples)
+            run = numpy.empty(
+                (run_end - run_start, self.properties.Channels),
+                self.sample_type,
+            )
+            self._decode_audio(run_start, run)
+            for b in range(first, last + 1):
+                if first == last:
+                    block = run
+                else:
+                    offset = (b - first) * size
+                    block = run[offset : offset + size].copy()
+                block.flags.writeable = False
+                self.audio_cache.put(b, block, block.nbytes)
+                blocks[b] = block
+        for b in block_numbers:
+            block_start = b * size
+            lo = max(start, block_start)
+            hi = min(end, block_start + size)
+            audio[lo - start : hi - start] = blocks[b][
+                lo - block_start : hi - block_start
+            ]
+
+    def materialize(self, path=None, dtype=None):
+        """Decode the whole track once into a file and return it as a
+        read-only memory-mapped array of shape (samples, channels),
+        converted to dtype if given (only without loss). The file (by default
+        in the index cache, or a temporary directory limited to a few GiB,
+        and then evicted like index files) is reused as long as its header
+        matches the source file, and get_audio() then returns views of it.
+        """
+        dtype = numpy.dtype(self.sample_type if dtype is None else dtype)
+        if not numpy.can_cast(self.sample_type, dtype):
+            raise ValueError(
+                "can’t convert samples of {} to {} without loss".format(
+                    numpy.dtype(self.sample_type), dtype
+                )
+            )
+        index_cache = None
+        if path is None:
+            index_cache = _index_cache
+            if index_cache is None:
+                index_cache = IndexCache(
+                    os.path.join(tempfile.gettempdir(), "ffms2"),
+                    self._TEMP_CACHE_MAX_BYTES,
+                )
+            path = self._get_audio_cache_file(index_cache, dtype)
+        path = str(path)
+        header = self._get_audio_cache_header(dtype)
+        try:
+            materialized = _read_audio_cache(path, header)
+        except (OSError, ValueError):
+            materialized = None
+        if materialized is None:
+            self._write_audio_cache(path, header, dtype)
+            materialized = _read_audio_cache(path, header)
+            if index_cache is not None:
+                index_cache.evict()
+        elif index_cache is not None:
+            _touch(path)
+        self._materialized = materialized
+        return materialized
+
+    def _get_audio_cache_file(self, index_cache, dtype):
+        return os.path.join(
+            index_cache.path,
+            "{}_track{}_delay{}_{}{}".format(
+                index_cache.get_fingerprint(self.index.source_file),
+                self.track_number,
+                self.delay_mode,
+                dtype.name,
+                AUDIO_CACHE_EXT,
+            ),
+        )
+
+    def _get_audio_cache_header(self, dtype):
+        st = os.stat(self.index.source_file)
+        p = self.properties
+        return {
+            "source_size": st.st_size,
+            "source_mtime_ns": st.st_mtime_ns,
+            "track_number": self.track_number,
+            "delay_mode": self.delay_mode,
+            "sample_rate": p.SampleRate,
+            "channels": p.Channels,
+            "num_samples": p.NumSamples,
+            "dtype": dtype.str,
+        }
+
+    def _write_audio_cache(self, path, header, dtype):
+        directory, name = os.path.split(path)
+        fd, temp_file = tempfile.mkstemp(".tmp", name, directory or None)
+        os.close(fd)
+        try:
+            if header["num_samples"]:
+                data = numpy.memmap(
+                    temp_file,
+                    dtype,
+                    "w+",
+                    _AUDIO_CACHE_HEADER_SIZE,
+                    (header["num_samples"], header["channels"]),
+                )
+                self._decode_all_audio(data)
+                data.flush()
+                del data
+            # Written last, so that only complete files are reused
+            with open(temp_file, "r+b") as f:
+                f.write(_encode_audio_cache_header(header))
+            os.replace(temp_file, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temp_file)
+            raise
+
+    def _decode_all_audio(self, data):
+        block_size = self._MATERIALIZE_BLOCK_SIZE
+        audio = None
+        if data.dtype != self.sample_type:
+            audio = numpy.empty(
+                (block_size, self.properties.Channels), self.sample_type
+            )
+        for start in range(0, len(data), block_size):
+            block = data[start : start + block_size]
+            if audio is None:
+                self._decode_audio(start, block)
+            else:
+                self._decode_audio(start, audio[: len(block)])
+                block[:] = audio[: len(block)]
+
+    def linear_access(
+        self,
+        start=0,
+        end=None,
+        rate=_DEFAULT_RATE,
+        block_size=None,
+        prefetch=0,
+    ):
         """Return a linear iterator over the audio samples.
+        Samples are decoded by blocks of block_size samples
+        (one second by default), up to prefetch blocks ahead
+        on a background thread.
         """
-        return AudioLinearAccess(self, start, end, rate)
+        return AudioLinearAccess(self, start, end, rate, block_size, prefetch)
+
+    @property
+    def stream_info(self):
+        """Stream information
+        """
+        p = self.properties
+        return AudioStreamInfo(
+            p.SampleRate,
+            p.SampleFormat,
+            p.BitsPerSample,
+            p.Channels,
+            p.ChannelLayout,
+            p.FirstTime,
+            p.LastTime,
+            p.NumSamples,
+        )
 
     @property
     def track(self):
@@ -836,6 +2139,35 @@ class AudioSource(AudioType, Source):
         return self._track
 
 
+_AUDIO_CACHE_MAGIC = b"FFMS2AUD"
+_AUDIO_CACHE_HEADER_SIZE = 4096
+
+
+def _encode_audio_cache_header(header):
+    data = _AUDIO_CACHE_MAGIC + json.dumps(header).encode()
+    if len(data) > _AUDIO_CACHE_HEADER_SIZE:
+        raise ValueError("audio cache header too large")
+    return data.ljust(_AUDIO_CACHE_HEADER_SIZE, b" ")
+
+
+def _read_audio_cache(path, header):
+    """Map the samples of an audio cache file,
+    or return None if its header doesn’t match.
+    """
+    with open(path, "rb") as f:
+        data = f.read(_AUDIO_CACHE_HEADER_SIZE)
+    if data[: len(_AUDIO_CACHE_MAGIC)] != _AUDIO_CACHE_MAGIC:
+        return None
+    if json.loads(data[len(_AUDIO_CACHE_MAGIC) :].decode()) != header:
+        return None
+    shape = header["num_samples"], header["channels"]
+    if not shape[0]:
+        return numpy.empty(shape, header["dtype"])
+    return numpy.memmap(
+        path, header["dtype"], "r", _AUDIO_CACHE_HEADER_SIZE, shape
+    )
+
+
 class AudioLinearAccess(Sized, Iterable):
     """Linear access to audio
     """
@@ -846,8 +2178,14 @@ class AudioLinearAccess(Sized, Iterable):
         start_frame=0,
         end_frame=None,
         rate=AudioSource._DEFAULT_RATE,
+        block_size=None,
+        prefetch=0,
     ):
         self.parent = parent
+        self.prefetch = prefetch
+        self.block_size = (
+            parent.properties.SampleRate if block_size is None else block_size
+        )
         self.num_samples = parent.properties.NumSamples
         self.start_frame = (
             self.num_samples + start_frame if start_frame < 0 else start_frame
@@ -883,56 +2221,89 @@ class AudioLinearAccess(Sized, Iterable):
         return math.ceil(self.num_samples / self.samples_per_frame)
 
     def __iter__(self):
-        source = self.parent._source
-        l, count_l = self.l, self.count_l
-        audio_l = numpy.empty(
-            (count_l, self.parent.properties.Channels), self.parent.sample_type
-        )
-        buf_l = audio_l.ctypes.data_as(c_void_p)
-        p = self.start_frame
-        end = self.end_frame
-        if l is None:
-            np = p + count_l
-            while np <= end:
-                if FFMS_GetAudio(source, buf_l, p, count_l, byref(err_info)):
-                    raise Error
-                yield audio_l
-                p = np
-                np = p + count_l
+        """Yield views of a block buffer, valid until the next block
+        is decoded. With prefetch, blocks are decoded on a background
+        thread, up to prefetch blocks ahead, into a ring of reused buffers,
+        and the source must not be used otherwise while iterating.
+        """
+        blocks = self._iter_blocks()
+        if self.prefetch > 0:
+            buffers = _read_ahead(blocks, self._fill_block, self.prefetch + 1)
         else:
-            h, count_h = self.h, self.count_h
-            audio_h = numpy.empty(
-                (count_h, self.parent.properties.Channels),
-                self.parent.sample_type,
-            )
-            buf_h = audio_h.ctypes.data_as(c_void_p)
-            loop = True
-            while loop:
-                for n, count, audio, buf in [
-                    (h, count_h, audio_h, buf_h),
-                    (l, count_l, audio_l, buf_l),
-                ]:
-                    for _ in range(n):
-                        np = p + count
-                        if np > end:
-                            loop = False
-                            break
-                        if FFMS_GetAudio(
-                            source, buf, p, count, byref(err_info)
-                        ):
-                            raise Error
-                        yield audio
-                        p = np
-        count = end - p
-        if count:
+            buffers = self._decode_blocks(blocks)
+        with contextlib.closing(buffers):
+            for audio, chunks in buffers:
+                for offset, count in chunks:
+                    yield audio[offset : offset + count]
+
+    def _decode_blocks(self, blocks):
+        buffer = None
+        for block in blocks:
+            buffer = self._fill_block(block, buffer)
+            yield buffer
+
+    def _fill_block(self, block, buffer):
+        block_start, block_count, chunks = block
+        audio = None if buffer is None else buffer[0]
+        if audio is None or len(audio) < block_count:
             audio = numpy.empty(
-                (count, self.parent.properties.Channels),
+                (
+                    max(block_count, self.block_size),
+                    self.parent.properties.Channels,
+                ),
                 self.parent.sample_type,
             )
-            buf = audio.ctypes.data_as(c_void_p)
-            if FFMS_GetAudio(source, buf, p, count, byref(err_info)):
-                raise Error
-            yield audio
+        if block_count and FFMS_GetAudio(
+            self.parent._source,
+            audio.ctypes.data_as(c_void_p),
+            block_start,
+            block_count,
+            byref(_get_err_info()),
+        ):
+            raise Error
+        return audio, chunks
+
+    def _iter_blocks(self):
+        """Yield the start and size of each block of consecutive chunks,
+        no larger than block_size samples unless it’s a single chunk,
+        with the offset and size of its chunks.
+        """
+        chunks = []
+        block_start = block_end = None
+        for p, count in self._iter_chunks():
+            if chunks and p + count - block_start > self.block_size:
+                yield block_start, block_end - block_start, chunks
+                chunks = []
+            if not chunks:
+                block_start = p
+            chunks.append((p - block_start, count))
+            block_end = p + count
+        if chunks:
+            yield block_start, block_end - block_start, chunks
+
+    def _iter_chunks(self):
+        """Yield the start and size of each chunk: count_h samples
+        h times then count_l samples l times (or always count_l samples),
+        then what remains.
+        """
+        p = self.start_frame
+        end = self.end_frame
+        if self.l is None:
+            pattern = [(1, self.count_l)]
+        else:
+            pattern = [(self.h, self.count_h), (self.l, self.count_l)]
+        loop = True
+        while loop:
+            for n, count in pattern:
+                for _ in range(n):
+                    np = p + count
+                    if np > end:
+                        loop = False
+                        break
+                    yield p, count
+                    p = np
+        if end > p:
+            yield p, end - p
 
 
 class Track:
@@ -943,7 +2314,7 @@ class Track:
         self._track = track
         self.number = number
         self.index = index
-        self._frame_info_list = None
+        self._frame_info = None
 
     @classmethod
     def create(cls, track, number, index):
@@ -960,24 +2331,110 @@ class Track:
         """
         return FFMS_GetTrackType(self._track)
 
+    @property
+    def frame_info(self):
+        """Read-only structured array of frame information,
+        with fields pts, repeat_pict and keyframe
+        """
+        if self._frame_info is None:
+            self._frame_info = _read_frame_info(self._track)
+        return self._frame_info
+
     @property
     def frame_info_list(self):
-        """List of frame information
+        """Sequence of frame information (FFMS_FrameInfo)
         """
-        if self._frame_info_list is None:
-            self._frame_info_list = [
-                FFMS_GetFrameInfo(self._track, n)[0]
-                for n in range(FFMS_GetNumFrames(self._track))
-            ]
-        return self._frame_info_list
+        return _FrameInfoList(self.frame_info)
 
     def _get_output_file(self, ext):
         index_file = (
-            self.index.index_file or self.index.source_file + FFINDEX_EXT
+            self.index.index_file or str(self.index.source_file) + FFINDEX_EXT
         )
         return "{}_track{:02}.{}.txt".format(index_file, self.number, ext)
 
 
+_FRAME_INFO_DTYPE = numpy.dtype(
+    [("pts", numpy.int64), ("repeat_pict", numpy.int32), ("keyframe", bool)]
+)
+
+
+def _read_frame_info(track):
+    num_frames = FFMS_GetNumFrames(track)
+    frame_info = numpy.empty(num_frames, _FRAME_INFO_DTYPE)
+    if num_frames:
+        first = cast(FFMS_GetFrameInfo(track, 0), c_void_p).value
+        last = cast(FFMS_GetFrameInfo(track, num_frames - 1), c_void_p).value
+        stride = sizeof(FFMS_FrameInfo)
+        if num_frames > 1:
+            stride = cast(FFMS_GetFrameInfo(track, 1), c_void_p).value - first
+        if (
+            stride >= sizeof(FFMS_FrameInfo)
+            and last == first + (num_frames - 1) * stride
+        ):
+            # Frame information is stored in an array: read it at once.
+            size = (num_frames - 1) * stride + sizeof(FFMS_FrameInfo)
+            infos = numpy.ndarray(
+                (num_frames,),
+                numpy.dtype(FFMS_FrameInfo),
+                (c_uint8 * size).from_address(first),
+                strides=(stride,),
+            )
+            frame_info["pts"] = infos["PTS"]
+            frame_info["repeat_pict"] = infos["RepeatPict"]
+            frame_info["keyframe"] = infos["KeyFrame"]
+        else:
+            for n in range(num_frames):
+                info = FFMS_GetFrameInfo(track, n)[0]
+                frame_info[n] = info.PTS, info.RepeatPict, info.KeyFrame
+    return _read_only(frame_info)
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+def _as_lookup_array(values):
+    """Return values as an array, and whether they were a scalar.
+    """
+    array = numpy.asarray(values)
+    if array.dtype.kind not in "biuf":
+        array = numpy.asarray(values, object)
+    return array, array.ndim == 0
+
+
+def _get_closest(pts, targets):
+    """Get the positions of the closest timestamps, preferring later ones
+    (as FFMS_Track::ClosestFrameFromPTS()).
+    """
+    if not len(pts):
+        return numpy.zeros(numpy.shape(targets), numpy.intp)
+    i = numpy.searchsorted(pts, targets)
+    after = pts[i.clip(max=len(pts) - 1)]
+    before = pts[(i - 1).clip(min=0)]
+    i -= (i == len(pts)) | (
+        (i > 0) & (numpy.abs(after - targets) > numpy.abs(before - targets))
+    )
+    return i
+
+
+class _FrameInfoList(Sequence):
+    """Frame information structures, created on access
+    """
+
+    def __init__(self, frame_info):
+        self._frame_info = frame_info
+
+    def __len__(self):
+        return len(self._frame_info)
+
+    def __getitem__(self, n):
+        if isinstance(n, slice):
+            return [self[i] for i in range(*n.indices(len(self)))]
+        pts, repeat_pict, keyframe = self._frame_info[n].item()
+        return FFMS_FrameInfo(pts, repeat_pict, keyframe)
+
+
 class VideoTrack(VideoType, Track):
     """FFMS_Track of type FFMS_TYPE_VIDEO
     """
@@ -987,6 +2444,9 @@ class VideoTrack(VideoType, Track):
     def __init__(self, track, number, index):
         super().__init__(track, number, index)
         self._timecodes = None
+        self._timecode_array = None
+        self._duration_array = None
+        self._keyframe_array = None
 
     @property
     def time_base(self):
@@ -1000,13 +2460,112 @@ class VideoTrack(VideoType, Track):
         """List of timecodes
         """
         if self._timecodes is None:
+            self._timecodes = self.timecode_array.tolist()
+        return self._timecodes
+
+    @property
+    def pts_array(self):
+        """Read-only array of presentation timestamps in time base units
+        """
+        return self.frame_info["pts"]
+
+    @property
+    def timecode_array(self):
+        """Read-only array of timecodes
+        """
+        if self._timecode_array is None:
             time_base = self.time_base
             num, den = time_base.numerator, time_base.denominator
-            self._timecodes = [
-                frame_info.PTS * num / den
-                for frame_info in self.frame_info_list
+            self._timecode_array = _read_only(self.pts_array * num / den)
+        return self._timecode_array
+
+    @property
+    def duration_array(self):
+        """Read-only array of frame durations.
+        The last frame lasts as long as the one before it.
+        """
+        if self._duration_array is None:
+            timecodes = self.timecode_array
+            durations = numpy.diff(timecodes, append=timecodes[-1:])
+            if len(durations) > 1:
+                durations[-1] = durations[-2]
+            self._duration_array = _read_only(durations)
+        return self._duration_array
+
+    @property
+    def keyframe_array(self):
+        """Read-only array of keyframe positions
+        """
+        if self._keyframe_array is None:
+            self._keyframe_array = _read_only(
+                numpy.flatnonzero(self.frame_info["keyframe"])
+            )
+        return self._keyframe_array
+
+    def frame_at_time(self, times, closest=False):
+        """Get the frames shown at given timecodes (in ms).
+        If closest is true, get the frames with the closest timestamps
+        instead, like VideoSource.get_frame_by_time().
+        Timecodes may be a scalar or an array, of numbers or Fractions.
+        """
+        times, scalar = _as_lookup_array(times)
+        if closest:
+            time_base = self.time_base
+            if times.dtype == object:
+                pts = [math.trunc(Fraction(t) / time_base) for t in times.flat]
+                pts = numpy.array(pts, numpy.int64).reshape(times.shape)
+            else:
+                pts = numpy.trunc(
+                    times * time_base.denominator / time_base.numerator
+                )
+            frames = _get_closest(self.pts_array, pts)
+        elif times.dtype == object:
+            time_base = self.time_base
+            pts = [math.floor(Fraction(t) / time_base) for t in times.flat]
+            pts = numpy.array(pts, numpy.int64).reshape(times.shape)
+            frames = numpy.searchsorted(self.pts_array, pts, "right") - 1
+        else:
+            frames = numpy.searchsorted(self.timecode_array, times, "right")
+            frames -= 1
+        frames = frames.clip(0, max(len(self.pts_array) - 1, 0))
+        return frames.item() if scalar else frames
+
+    def time_at_frame(self, frames, exact=False):
+        """Get the timecodes (in ms) of given frames.
+        If exact is true, timecodes are Fractions.
+        Frames may be a scalar or an array.
+        """
+        frames, scalar = _as_lookup_array(frames)
+        if exact:
+            time_base = self.time_base
+            times = numpy.empty(frames.shape, object)
+            times.flat = [
+                int(pts) * time_base for pts in self.pts_array[frames].flat
             ]
-        return self._timecodes
+        else:
+            times = self.timecode_array[frames]
+        return times.item() if scalar else times
+
+    def prev_keyframe(self, frames):
+        """Get the last keyframes at or before given frames (-1 if none).
+        Frames may be a scalar or an array.
+        """
+        frames, scalar = _as_lookup_array(frames)
+        keyframes = numpy.append(-1, self.keyframe_array)
+        i = numpy.searchsorted(keyframes, frames, "right")
+        keyframes = keyframes[i - 1]
+        return keyframes.item() if scalar else keyframes
+
+    def next_keyframe(self, frames):
+        """Get the first keyframes after given frames
+        (the number of frames if none), so that
+        range(prev_keyframe(n), next_keyframe(n)) is the group of frame n.
+        Frames may be a scalar or an array.
+        """
+        frames, scalar = _as_lookup_array(frames)
+        keyframes = numpy.append(self.keyframe_array, len(self.pts_array))
+        keyframes = keyframes[numpy.searchsorted(keyframes, frames, "right")]
+        return keyframes.item() if scalar else keyframes
 
     def write_timecodes(self, timecodes_file=None):
         """Write timecodes to disk.
@@ -1014,7 +2573,9 @@ class VideoTrack(VideoType, Track):
         if not timecodes_file:
             timecodes_file = self._get_output_file("tc")
         if FFMS_WriteTimecodes(
-            self._track, get_encoded_path(timecodes_file), byref(err_info)
+            self._track,
+            get_encoded_path(timecodes_file),
+            byref(_get_err_info()),
         ):
             raise Error
 
@@ -1022,17 +2583,28 @@ class VideoTrack(VideoType, Track):
     def keyframes(self):
         """List of keyframe positions
         """
-        return [
-            n
-            for n in range(len(self.frame_info_list))
-            if self.frame_info_list[n].KeyFrame
-        ]
+        return self.keyframe_array.tolist()
 
     @property
     def keyframes_as_timecodes(self):
         """List of keyframes as timecodes
         """
-        return [self.timecodes[n] for n in self.keyframes]
+        return self.timecode_array[self.keyframe_array].tolist()
+
+    def get_nearest_keyframes(self, times):
+        """Get the sorted unique keyframes nearest to given timecodes.
+        """
+        keyframes = self.keyframe_array
+        if not len(keyframes):
+            return []
+        keyframe_times = self.timecode_array[keyframes]
+        times = numpy.asarray(times, numpy.float64)
+        i = numpy.searchsorted(keyframe_times, times).clip(1, len(keyframes))
+        i -= (i == len(keyframes)) | (
+            times - keyframe_times[i - 1]
+            <= keyframe_times[i.clip(max=len(keyframes) - 1)] - times
+        )
+        return numpy.unique(keyframes[i]).tolist()
 
     def write_keyframes(self, keyframes_file=None):
         """Write keyframe numbers to disk.
@@ -1077,3 +2649,6 @@ def list_to_mask(l):
 
 def mask_to_list(m, num_bits=64):
     return [n for n in range(num_bits) if m & 1 << n]
+
+
+from .parallel import index_many  # noqa: E402
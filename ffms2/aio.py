@@ -0,0 +1,212 @@
+"""asyncio interface
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import ffms2
+
+from . import FFMS_IEH_STOP_TRACK, Indexer, get_auto_index_policy
+
+__all__ = [
+    "get_executor",
+    "set_executor",
+    "index_async",
+    "VideoSource",
+    "AudioSource",
+]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Returned by next() when an iterator is exhausted
+_END = object()
+
+
+def get_executor():
+    """Get the executor running blocking calls,
+    by default a thread pool with one thread per CPU.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                os.cpu_count() or 1, thread_name_prefix="ffms2"
+            )
+        return _executor
+
+
+def set_executor(executor):
+    """Set the executor running blocking calls.
+    """
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+def _run(func, *args, **kwargs):
+    return asyncio.get_running_loop().run_in_executor(
+        get_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def index_async(
+    source_file,
+    tracks=None,
+    *,
+    error_handling=FFMS_IEH_STOP_TRACK,
+    progress=None,
+):
+    """Index the given tracks of a source file on the executor
+    (by default the tracks selected by the auto-indexing policy).
+    If progress is an asyncio.Queue, (current, total) events are put in it
+    as indexing goes, then None when it ends.
+    Cancelling the awaiting task cancels indexing.
+    """
+    loop = asyncio.get_running_loop()
+    cancelled = threading.Event()
+    last_pct = -1
+
+    def callback(current, total, private=None):
+        nonlocal last_pct
+        if progress is not None and total > 0:
+            # At most one event per percent
+            pct = current * 100 // total
+            if pct != last_pct:
+                last_pct = pct
+                loop.call_soon_threadsafe(
+                    progress.put_nowait, (current, total)
+                )
+        return int(cancelled.is_set())
+
+    def index():
+        indexer = Indexer(source_file)
+        if tracks is None:
+            selected = get_auto_index_policy().select_tracks(
+                indexer.track_info_list, None
+            )
+        else:
+            selected = set(tracks)
+        for track in indexer.track_info_list:
+            indexer.track_index_settings(track.num, track.num in selected, 0)
+        indexer.set_progress_callback(callback)
+        return indexer.do_indexing2(error_handling)
+
+    future = _run(index)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        cancelled.set()
+        # Let indexing stop before giving up on it
+        await asyncio.wait([future])
+        if not future.cancelled():
+            future.exception()
+        raise
+    finally:
+        if progress is not None:
+            progress.put_nowait(None)
+
+
+class _AsyncSource:
+    """Serialize the calls to a source running on the executor.
+    """
+
+    @classmethod
+    async def open(cls, *args, **kwargs):
+        """Create a source on the executor, indexing if needed.
+        """
+        return await _run(cls, *args, **kwargs)
+
+    @property
+    def _lock(self):
+        lock = self.__dict__.get("_async_lock")
+        if lock is None:
+            lock = self._async_lock = asyncio.Lock()
+        return lock
+
+    async def _call(self, func, *args, **kwargs):
+        async with self._lock:
+            return await _run(func, *args, **kwargs)
+
+    async def _iterate(self, iterable):
+        async with self._lock:
+            it = await _run(iter, iterable)
+            try:
+                while True:
+                    item = await _run(next, it, _END)
+                    if item is _END:
+                        break
+                    yield item
+            finally:
+                close = getattr(it, "close", None)
+                if close is not None:
+                    await _run(close)
+
+
+class VideoSource(_AsyncSource, ffms2.VideoSource):
+    """Video source with coroutines running on the executor,
+    one call at a time per source
+    """
+
+    async def get_frame_async(self, n, copy=True):
+        """Retrieve a given video frame.
+        Unless copy is false, the frame owns its data, so that it stays
+        valid when other tasks use the source.
+        """
+        if copy:
+            return await self._call(lambda: self.get_frame(n).copy())
+        return await self._call(self.get_frame, n)
+
+    async def get_frames_async(self, frame_numbers, out=None):
+        """Retrieve several video frames as stacked planes.
+        """
+        return await self._call(self.get_frames, frame_numbers, out)
+
+    def iter_frames_async(self, start=0, stop=None, step=1, prefetch=2):
+        """Return an async iterator over the planes of a range of frames,
+        like iter_frames(). Other calls wait until it’s closed.
+        """
+        return self._iterate(self.iter_frames(start, stop, step, prefetch))
+
+
+class AudioSource(_AsyncSource, ffms2.AudioSource):
+    """Audio source with coroutines running on the executor,
+    one call at a time per source
+    """
+
+    async def get_audio_async(self, start, count=None):
+        """Decode a number of audio samples (by default init_buffer()
+        samples) into a new array.
+        """
+        if count is None:
+            return await self._call(lambda: self.get_audio(start).copy())
+        return await self._call(self.get_audio, start, count)
+
+    async def get_audio_into_async(self, start, out):
+        """Decode audio samples into an array or buffer.
+        """
+        return await self._call(self.get_audio_into, start, out)
+
+    async def materialize_async(self, path=None, dtype=None):
+        """Decode the whole track once into a memory-mapped file,
+        like materialize().
+        """
+        return await self._call(self.materialize, path, dtype)
+
+    def linear_access_async(
+        self,
+        start=0,
+        end=None,
+        rate=ffms2.AudioSource._DEFAULT_RATE,
+        block_size=None,
+        prefetch=0,
+    ):
+        """Return an async iterator over the audio samples,
+        like linear_access(). Other calls wait until it’s closed.
+        """
+        return self._iterate(
+            self.linear_access(start, end, rate, block_size, prefetch)
+        )
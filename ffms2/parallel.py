@@ -0,0 +1,301 @@
+"""Index and decode with several processes
+"""
+
+import contextlib
+import math
+import os
+import tempfile
+import weakref
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy
+
+from . import (
+    FFINDEX_EXT,
+    FFMS_RESIZER_BICUBIC,
+    AutoIndexPolicy,
+    Error,
+    Index,
+    Indexer,
+    VideoSource,
+    _get_indexed_tracks,
+    get_index_cache,
+)
+
+__all__ = ["decode_range", "index_many", "IndexResult"]
+
+_CHUNKS_PER_WORKER = 4
+_MEMORY_PER_INDEXING = 256 << 20
+
+IndexResult = namedtuple(
+    "IndexResult", ("source_file", "index_file", "indexed", "error")
+)
+
+# Video sources opened by a worker process, by decoding parameters.
+_worker_sources = {}
+
+
+def index_many(
+    source_files,
+    workers=None,
+    *,
+    policy=None,
+    index_cache=None,
+    force=False,
+    max_memory=None,
+    memory_per_indexing=_MEMORY_PER_INDEXING,
+    mp_context=None,
+):
+    """Index many source files with several worker processes.
+    Tracks are selected by policy (an AutoIndexPolicy), and indexes are
+    written to index_cache (by default the one set with set_index_cache())
+    or next to source files. Files whose index already has these tracks
+    are skipped unless force is true.
+    At most workers files, and no more than max_memory bytes counting
+    memory_per_indexing bytes per file, are indexed at a time.
+    Yields an IndexResult for each file as soon as it’s done,
+    with indexed false if it was skipped and the exception if it failed.
+    """
+    if policy is None:
+        policy = AutoIndexPolicy()
+    if index_cache is None:
+        index_cache = get_index_cache()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if max_memory is not None:
+        workers = min(workers, max(max_memory // memory_per_indexing, 1))
+    source_files = iter(source_files)
+    with ProcessPoolExecutor(workers, mp_context) as executor:
+        pending = {}
+        try:
+            while True:
+                for source_file in source_files:
+                    future = executor.submit(
+                        _index_file,
+                        str(source_file),
+                        policy,
+                        index_cache,
+                        force,
+                    )
+                    pending[future] = source_file
+                    if len(pending) >= workers:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source_file = pending.pop(future)
+                    try:
+                        index_file, indexed = future.result()
+                    except Exception as e:
+                        yield IndexResult(source_file, None, False, e)
+                    else:
+                        yield IndexResult(
+                            source_file, index_file, indexed, None
+                        )
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _index_file(source_file, policy, index_cache, force):
+    if index_cache is not None:
+        index_file = index_cache.get_index_file(source_file)
+    else:
+        index_file = source_file + FFINDEX_EXT
+    indexer = Indexer(source_file)
+    tracks = policy.select_tracks(indexer.track_info_list, None)
+    if not force:
+        try:
+            index = Index.read(index_file, source_file)
+        except Error:
+            pass
+        else:
+            if tracks <= set(_get_indexed_tracks(index)):
+                return index_file, False
+    for track in indexer.track_info_list:
+        indexer.track_index_settings(track.num, track.num in tracks, 0)
+    index = indexer.do_indexing2(policy.error_handling)
+    if index_cache is not None:
+        index_cache.put(source_file, index)
+    else:
+        index.write(index_file)
+    return index_file, True
+
+
+def decode_range(
+    source_file,
+    track_number=None,
+    start=0,
+    stop=None,
+    workers=None,
+    *,
+    index_file=None,
+    out_file=None,
+    target_formats=None,
+    width=None,
+    height=None,
+    resizer=FFMS_RESIZER_BICUBIC,
+    mp_context=None,
+):
+    """Decode a range of video frames with several worker processes.
+    The range is split at keyframes and each worker opens its own video
+    source from the index file (by default the one the source got from
+    the index cache or the source file, or else a temporary file), writing
+    its frames into a memory-mapped file (out_file or a temporary file,
+    removed once the returned arrays are unmapped).
+    Returns the planes stacked in frame order, like get_frames().
+    """
+    if index_file:
+        try:
+            index = Index.read(index_file, source_file)
+            vsource = VideoSource(source_file, track_number, index)
+        except Error:
+            vsource = VideoSource(source_file, track_number)
+            vsource.index.write(index_file)
+    else:
+        vsource = VideoSource(source_file, track_number)
+        index_file = vsource.index.index_file
+        # A shared index may have been written to a file since removed
+        if index_file and not os.path.isfile(index_file):
+            index_file = None
+    index = vsource.index
+    track_number = vsource.track_number
+    if stop is None:
+        stop = vsource.properties.NumFrames
+    if stop <= start:
+        raise ValueError("empty frame range")
+
+    if isinstance(target_formats, list):
+        target_formats = tuple(target_formats)
+    output_format = target_formats, width, height, resizer
+    if _has_output_format(output_format):
+        vsource.set_output_format(*output_format)
+    planes = [p for p in vsource.get_frame(start).planes if p.size]
+    count = stop - start
+    layout = []
+    offset = 0
+    for p in planes:
+        shape = (count,) + p.shape
+        layout.append((offset, shape, p.dtype.str))
+        offset += count * p.nbytes
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = _split_at_keyframes(
+        vsource.track.keyframes, start, stop, workers * _CHUNKS_PER_WORKER
+    )
+    del vsource
+
+    if out_file:
+        data = numpy.memmap(out_file, numpy.uint8, "w+", shape=(offset,))
+    else:
+        fd, out_file = tempfile.mkstemp(prefix="ffms2-", suffix=".raw")
+        os.close(fd)
+        try:
+            data = numpy.memmap(out_file, numpy.uint8, "w+", shape=(offset,))
+        except BaseException:
+            _remove_file(out_file)
+            raise
+        # The file can't be removed while mapped under Windows
+        weakref.finalize(data.base, _remove_file, out_file)
+    temporary_index_file = None
+    if not index_file:
+        fd, temporary_index_file = tempfile.mkstemp(
+            prefix="ffms2-", suffix=FFINDEX_EXT
+        )
+        os.close(fd)
+    try:
+        if temporary_index_file:
+            index_file = temporary_index_file
+            index.write(index_file)
+            # Not persisted: don't let other sources rely on it
+            index.index_file = None
+        with ProcessPoolExecutor(workers, mp_context) as executor:
+            futures = [
+                executor.submit(
+                    _decode_chunk,
+                    str(source_file),
+                    str(index_file),
+                    track_number,
+                    output_format,
+                    out_file,
+                    layout,
+                    start,
+                    chunk_start,
+                    chunk_stop,
+                )
+                for chunk_start, chunk_stop in chunks
+            ]
+            for future in futures:
+                future.result()
+    finally:
+        if temporary_index_file:
+            _remove_file(temporary_index_file)
+    out = _get_plane_arrays(data, layout)
+    return out[0] if len(out) == 1 else out
+
+
+def _remove_file(path):
+    with contextlib.suppress(OSError):
+        os.remove(path)
+
+
+def _has_output_format(output_format):
+    target_formats, width, height, _ = output_format
+    return not (target_formats is None and width is None and height is None)
+
+
+def _split_at_keyframes(keyframes, start, stop, num_chunks):
+    """Split range(start, stop) into at most about num_chunks chunks,
+    each starting at a keyframe except maybe the first one.
+    """
+    size = math.ceil((stop - start) / max(num_chunks, 1))
+    chunks = []
+    chunk_start = start
+    for n in keyframes:
+        if n >= stop:
+            break
+        if n - chunk_start >= size:
+            chunks.append((chunk_start, n))
+            chunk_start = n
+    chunks.append((chunk_start, stop))
+    return chunks
+
+
+def _get_plane_arrays(data, layout):
+    arrays = []
+    for offset, shape, dtype in layout:
+        dtype = numpy.dtype(dtype)
+        size = int(numpy.prod(shape)) * dtype.itemsize
+        arrays.append(data[offset : offset + size].view(dtype).reshape(shape))
+    return arrays
+
+
+def _decode_chunk(
+    source_file,
+    index_file,
+    track_number,
+    output_format,
+    out_file,
+    layout,
+    start,
+    chunk_start,
+    chunk_stop,
+):
+    key = source_file, index_file, track_number, output_format
+    vsource = _worker_sources.get(key)
+    if vsource is None:
+        index = Index.read(index_file, source_file)
+        vsource = VideoSource(source_file, track_number, index)
+        if _has_output_format(output_format):
+            vsource.set_output_format(*output_format)
+        _worker_sources[key] = vsource
+    data = numpy.memmap(out_file, numpy.uint8, "r+")
+    out = _get_plane_arrays(data, layout)
+    for n in range(chunk_start, chunk_stop):
+        planes = [p for p in vsource.get_frame(n).planes if p.size]
+        for a, p in zip(out, planes):
+            a[n - start] = p
+    data.flush()
@@ -0,0 +1,139 @@
+"""Pixel format descriptors
+"""
+
+from collections import namedtuple
+
+from .libffms2 import FFMS_GetPixFmt
+
+__all__ = ["PixFmtDescriptor", "PlaneDescriptor", "get_pix_fmt_desc"]
+
+PixFmtDescriptor = namedtuple(
+    "PixFmtDescriptor",
+    ("name", "dtype", "log2_chroma_w", "log2_chroma_h", "planes"),
+)
+PlaneDescriptor = namedtuple("PlaneDescriptor", ("components", "subsampled"))
+
+_LUMA = PlaneDescriptor(1, False)
+_CHROMA = PlaneDescriptor(1, True)
+_INTERLEAVED_CHROMA = PlaneDescriptor(2, True)
+_YUV = (_LUMA, _CHROMA, _CHROMA)
+_YUVA = _YUV + (_LUMA,)
+_NV = (_LUMA, _INTERLEAVED_CHROMA)
+
+_SUBSAMPLINGS = {
+    "420": (1, 1),
+    "422": (1, 0),
+    "440": (0, 1),
+    "444": (0, 0),
+    "411": (2, 0),
+    "410": (2, 2),
+}
+_HIGH_BIT_DEPTHS = [9, 10, 12, 14, 16]
+_ENDIANNESS = {"le": "<", "be": ">"}
+
+
+def _get_descriptors():
+    descs = []
+
+    def add(name, dtype, log2_chroma_w, log2_chroma_h, planes):
+        descs.append(
+            PixFmtDescriptor(name, dtype, log2_chroma_w, log2_chroma_h, planes)
+        )
+
+    for subsampling, (log2_w, log2_h) in _SUBSAMPLINGS.items():
+        add("yuv{}p".format(subsampling), "u1", log2_w, log2_h, _YUV)
+        add("yuvj{}p".format(subsampling), "u1", log2_w, log2_h, _YUV)
+        add("yuva{}p".format(subsampling), "u1", log2_w, log2_h, _YUVA)
+        for depth in _HIGH_BIT_DEPTHS:
+            for suffix, order in _ENDIANNESS.items():
+                add(
+                    "yuv{}p{}{}".format(subsampling, depth, suffix),
+                    order + "u2",
+                    log2_w,
+                    log2_h,
+                    _YUV,
+                )
+                add(
+                    "yuva{}p{}{}".format(subsampling, depth, suffix),
+                    order + "u2",
+                    log2_w,
+                    log2_h,
+                    _YUVA,
+                )
+
+    add("gray", "u1", 0, 0, (_LUMA,))
+    add("gbrp", "u1", 0, 0, (_LUMA,) * 3)
+    add("gbrap", "u1", 0, 0, (_LUMA,) * 4)
+    for depth in _HIGH_BIT_DEPTHS:
+        for suffix, order in _ENDIANNESS.items():
+            add("gray{}{}".format(depth, suffix), order + "u2", 0, 0, (_LUMA,))
+            add(
+                "gbrp{}{}".format(depth, suffix),
+                order + "u2",
+                0,
+                0,
+                (_LUMA,) * 3,
+            )
+            add(
+                "gbrap{}{}".format(depth, suffix),
+                order + "u2",
+                0,
+                0,
+                (_LUMA,) * 4,
+            )
+    for suffix, order in _ENDIANNESS.items():
+        add("grayf32" + suffix, order + "f4", 0, 0, (_LUMA,))
+        add("gbrpf32" + suffix, order + "f4", 0, 0, (_LUMA,) * 3)
+        add("gbrapf32" + suffix, order + "f4", 0, 0, (_LUMA,) * 4)
+
+    add("nv12", "u1", 1, 1, _NV)
+    add("nv21", "u1", 1, 1, _NV)
+    add("nv16", "u1", 1, 0, _NV)
+    add("nv24", "u1", 0, 0, _NV)
+    add("nv42", "u1", 0, 0, _NV)
+    for name in ["p010", "p016"]:
+        for suffix, order in _ENDIANNESS.items():
+            add(name + suffix, order + "u2", 1, 1, _NV)
+
+    for name in ["yuyv422", "uyvy422", "yvyu422"]:
+        add(name, "u1", 0, 0, (PlaneDescriptor(2, False),))
+    for name in ["rgb24", "bgr24"]:
+        add(name, "u1", 0, 0, (PlaneDescriptor(3, False),))
+    for name in [
+        "rgba",
+        "bgra",
+        "argb",
+        "abgr",
+        "rgb0",
+        "bgr0",
+        "0rgb",
+        "0bgr",
+    ]:
+        add(name, "u1", 0, 0, (PlaneDescriptor(4, False),))
+    for suffix, order in _ENDIANNESS.items():
+        for name in ["rgb48", "bgr48"]:
+            add(
+                name + suffix, order + "u2", 0, 0, (PlaneDescriptor(3, False),)
+            )
+        for name in ["rgba64", "bgra64"]:
+            add(
+                name + suffix, order + "u2", 0, 0, (PlaneDescriptor(4, False),)
+            )
+    return descs
+
+
+_descs_by_pix_fmt = None
+
+
+def get_pix_fmt_desc(pix_fmt):
+    """Get the descriptor of a pixel format, or None if it’s unknown.
+    """
+    global _descs_by_pix_fmt
+    if _descs_by_pix_fmt is None:
+        descs_by_pix_fmt = {}
+        for desc in _get_descriptors():
+            n = FFMS_GetPixFmt(desc.name.encode())
+            if n >= 0:
+                descs_by_pix_fmt.setdefault(n, desc)
+        _descs_by_pix_fmt = descs_by_pix_fmt
+    return _descs_by_pix_fmt.get(pix_fmt)
@@ -1,15 +1,30 @@
 #!/usr/bin/env python3
 """Test suite for ffms2."""
 
+import ctypes
+import gc
+import os
+import shutil
+import tempfile
+import threading
 import unittest
 from pathlib import Path
 
+import numpy
+
 import ffms2
 
 ROOT_DIR = Path(__file__).parent
 
 
 class TestFFMS2(unittest.TestCase):
+    def setUp(self):
+        # Don't write index files next to test data
+        ffms2.set_auto_index_policy(ffms2.AutoIndexPolicy(persist=False))
+
+    def tearDown(self):
+        ffms2.set_auto_index_policy(None)
+
     def test_sample_video(self):
         source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
 
@@ -57,6 +72,598 @@ class TestFFMS2(unittest.TestCase):
         self.assertEqual(audio_source.properties.SampleFormat, 3)
         self.assertEqual(audio_source.properties.SampleRate, 44100)
 
+    def test_thread_local_errors(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        num_frames = video_source.properties.NumFrames
+
+        def get_error(n):
+            try:
+                video_source.get_frame(n)
+            except ffms2.Error as e:
+                return str(e)
+
+        messages = []
+        thread = threading.Thread(
+            target=lambda: messages.append(get_error(num_frames))
+        )
+        thread.start()
+        thread.join()
+        self.assertIsNotNone(messages[0])
+        self.assertIsNone(get_error(0))
+        self.assertEqual(get_error(num_frames), messages[0])
+
+    def test_frame_cache(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path, cache_size=1 << 26)
+        frame = video_source.get_frame(10)
+        planes = [plane.copy() for plane in frame.planes]
+        video_source.get_frame(11)
+        self.assertIs(video_source.get_frame(10), frame)
+        for plane, expected in zip(frame.planes, planes):
+            self.assertTrue((plane == expected).all())
+        self.assertEqual(video_source.frame_cache.hits, 1)
+        self.assertEqual(video_source.frame_cache.misses, 2)
+        video_source.set_output_format(width=64, height=32)
+        self.assertEqual(len(video_source.frame_cache), 0)
+
+    def test_get_frames(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        frame_numbers = [200, 3, 150, 3, 0]
+        planes = video_source.get_frames(frame_numbers)
+        self.assertEqual(planes[0].shape[0], len(frame_numbers))
+        for i, n in enumerate(frame_numbers):
+            frame = video_source.get_frame(n)
+            for stacked, plane in zip(planes, frame.planes):
+                self.assertTrue((stacked[i] == plane).all())
+
+    def test_iter_frames(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        expected = video_source.get_frames(range(10, 50, 4))
+        frames = [
+            [plane.copy() for plane in planes]
+            for planes in video_source.iter_frames(10, 50, 4)
+        ]
+        self.assertEqual(len(frames), 10)
+        for i, planes in enumerate(frames):
+            for stacked, plane in zip(expected, planes):
+                self.assertTrue((stacked[i] == plane).all())
+
+    def test_get_frame_into(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        frame_buffer = ffms2.FrameBuffer.like(video_source.get_frame(0))
+        for n in [5, 6, 100]:
+            self.assertIs(
+                video_source.get_frame_into(n, frame_buffer), frame_buffer
+            )
+        expected = video_source.get_frame(100).planes
+        for plane, view in zip(frame_buffer.planes, expected):
+            self.assertTrue((plane == view).all())
+        with self.assertRaises(ValueError):
+            video_source.get_frame_into(0, [numpy.empty(1, numpy.uint8)])
+
+        cached_source = ffms2.VideoSource(source_path, cache_size=1 << 24)
+        frame_buffer = ffms2.FrameBuffer.like(cached_source.get_frame(0))
+        for n in [5, 6, 100]:
+            cached_source.get_frame_into(n, frame_buffer)
+        self.assertEqual(frame_buffer._views, {})
+        expected = cached_source.get_frame(100).planes
+        for plane, view in zip(frame_buffer.planes, expected):
+            self.assertTrue((plane == view).all())
+
+    def test_planes(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        frame = video_source.get_frame(0)
+        width, height = frame.EncodedWidth, frame.EncodedHeight
+        desc = ffms2.get_pix_fmt_desc(frame.pix_fmt)
+        self.assertEqual(desc.name, "yuv420p")
+        y, u, v = frame.planes[:3]
+        self.assertEqual(y.shape, (height, width))
+        self.assertEqual(u.shape, ((height + 1) // 2, (width + 1) // 2))
+        self.assertEqual(v.shape, u.shape)
+        with video_source.output_format([ffms2.get_pix_fmt("rgb24")]):
+            (rgb,) = [p for p in video_source.get_frame(0).planes if p.size]
+            self.assertEqual(rgb.shape, (height, width, 3))
+            self.assertEqual(rgb.dtype, numpy.uint8)
+        with video_source.output_format(
+            [ffms2.get_pix_fmt("yuv420p10le")], 64, 32
+        ):
+            y = video_source.get_frame(0).planes[0]
+            self.assertEqual(y.shape, (32, 64))
+            self.assertEqual(y.dtype, numpy.uint16)
+
+    def test_frame_export(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        frame = video_source.get_frame(0)
+        with self.assertRaises(ValueError):
+            frame.array
+        video_source.set_output_format([ffms2.get_pix_fmt("rgb24")])
+        frame = video_source.get_frame(0)
+        self.assertTrue(frame.valid)
+        array = frame.array
+        self.assertEqual(array.shape[2], 3)
+        self.assertTrue(numpy.shares_memory(array, frame.planes[0]))
+        self.assertTrue((numpy.asarray(frame.array) == frame.planes[0]).all())
+        self.assertEqual(memoryview(frame.array).shape, array.shape)
+        # Frames are ctypes structures, exported as such
+        self.assertEqual(
+            memoryview(frame).nbytes, ctypes.sizeof(ffms2.FFMS_Frame)
+        )
+        try:
+            self.assertNotEqual(numpy.asarray(frame).shape, array.shape)
+        except ValueError:
+            pass
+        if hasattr(numpy, "from_dlpack"):
+            self.assertTrue((numpy.from_dlpack(frame) == array).all())
+        copy = frame.copy()
+        video_source.get_frame(1)
+        self.assertFalse(frame.valid)
+        self.assertTrue(copy.valid)
+
+    def test_copy_on_invalidate(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        frame = video_source.get_frame(0)
+        video_source.get_frame(1)
+        with self.assertRaises(ValueError):
+            frame.planes
+
+        video_source = ffms2.VideoSource(source_path, copy_on_invalidate=True)
+        frame = video_source.get_frame(0)
+        views = frame.planes
+        planes = [plane.copy() for plane in views]
+        next_frame = video_source.get_frame(1)
+        self.assertTrue(frame.valid)
+        self.assertTrue(next_frame.valid)
+        for plane, expected in zip(frame.planes, planes):
+            self.assertTrue((plane == expected).all())
+        # Views taken before the copy still show decoder memory
+        for view, plane in zip(views, frame.planes):
+            if plane.size:
+                self.assertFalse(numpy.shares_memory(view, plane))
+
+    def test_decode_range(self):
+        import ffms2.parallel
+
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        expected = video_source.get_frames(range(10, 100))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            planes = ffms2.parallel.decode_range(
+                str(source_path),
+                start=10,
+                stop=100,
+                workers=2,
+                index_file=os.path.join(temp_dir, "index.ffindex"),
+            )
+        for stacked, expected_stacked in zip(planes, expected):
+            self.assertTrue((stacked == expected_stacked).all())
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index_cache = ffms2.IndexCache(temp_dir)
+            ffms2.set_index_cache(index_cache)
+            try:
+                # Don't share the index of the source above
+                del video_source
+                gc.collect()
+                planes = ffms2.parallel.decode_range(
+                    str(source_path), start=10, stop=100, workers=2
+                )
+                self.assertIsNotNone(index_cache.get(source_path))
+            finally:
+                ffms2.set_index_cache(None)
+            out_file = planes[0].base.filename
+            self.assertTrue(os.path.exists(out_file))
+            del planes
+            gc.collect()
+            self.assertFalse(os.path.exists(out_file))
+
+    def test_thumbnails(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        keyframes = video_source.track.keyframes
+        frame_numbers, thumbnails = video_source.get_thumbnails(
+            5, 32, 18, [ffms2.get_pix_fmt("rgb24")]
+        )
+        self.assertTrue(set(frame_numbers) <= set(keyframes))
+        self.assertEqual(thumbnails.shape, (len(frame_numbers), 18, 32, 3))
+        self.assertEqual(
+            [n for n, frame in video_source.iter_keyframes()], keyframes
+        )
+
+        gray = ffms2.get_pix_fmt("gray")
+        video_source = ffms2.VideoSource(source_path, cache_size=1 << 20)
+        video_source.set_output_format([gray], 64, 32)
+        frame = video_source.get_frame(0)
+        video_source.get_thumbnails(5, 32, 18, [ffms2.get_pix_fmt("rgb24")])
+        self.assertIs(video_source.get_frame(0), frame)
+        video_source.frame_cache.clear()
+        frame = video_source.get_frame(0)
+        self.assertEqual((frame.ScaledWidth, frame.ScaledHeight), (64, 32))
+        self.assertEqual(frame.ConvertedPixelFormat, gray)
+
+    def test_native_format(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        frame = video_source.get_frame(0)
+        self.assertEqual(video_source.native_width, frame.EncodedWidth)
+        self.assertEqual(video_source.native_height, frame.EncodedHeight)
+        self.assertEqual(video_source.native_pix_fmt, frame.EncodedPixelFormat)
+        gray = ffms2.get_pix_fmt("gray")
+        video_source.set_output_format([gray], 64, 32)
+        video_source.set_output_format(width=48)
+        frame = video_source.get_frame(0)
+        self.assertEqual((frame.ScaledWidth, frame.ScaledHeight), (48, 32))
+        self.assertEqual(frame.ConvertedPixelFormat, gray)
+
+    def test_stream_info(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        index = ffms2.Indexer(source_path).do_indexing2()
+        video_source = ffms2.VideoSource(source_path, 0, index)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index_file = os.path.join(temp_dir, "index.ffindex")
+            index.write(index_file, stream_info=True)
+            stream_info = ffms2.Index.read_stream_info(index_file)
+            self.assertEqual(stream_info[0], video_source.stream_info)
+            self.assertEqual(stream_info[0].width, video_source.native_width)
+            index = ffms2.Index.read(index_file, str(source_path))
+            self.assertEqual(index.stream_info, stream_info)
+            index.write()
+            with self.assertRaises(ffms2.Error):
+                ffms2.Index.read_stream_info(index_file)
+
+    def test_frame_info(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        track = video_source.track
+        frame_info = track.frame_info
+        self.assertEqual(len(frame_info), video_source.properties.NumFrames)
+        self.assertEqual(
+            frame_info.dtype.names, ("pts", "repeat_pict", "keyframe")
+        )
+        self.assertTrue(frame_info["keyframe"][0])
+        self.assertTrue((numpy.diff(frame_info["pts"]) > 0).all())
+        frame_info_list = track.frame_info_list
+        self.assertEqual(len(frame_info_list), len(frame_info))
+        for n in [0, 1, len(frame_info) - 1]:
+            self.assertEqual(frame_info_list[n].PTS, frame_info["pts"][n])
+            self.assertEqual(
+                bool(frame_info_list[n].KeyFrame), frame_info["keyframe"][n]
+            )
+
+    def test_time_lookup(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        index = ffms2.Indexer(source_path).do_indexing2()
+        track = index.tracks[0]
+        timecodes = track.timecode_array
+        frames = numpy.arange(len(timecodes))
+        self.assertTrue((track.frame_at_time(timecodes) == frames).all())
+        self.assertTrue((track.time_at_frame(frames) == timecodes).all())
+        self.assertEqual(track.frame_at_time(timecodes[5] + 1), 5)
+        exact = track.time_at_frame(5, exact=True)
+        self.assertEqual(exact, track.pts_array[5] * track.time_base)
+        self.assertEqual(track.frame_at_time(exact), 5)
+        self.assertEqual(len(track.duration_array), len(timecodes))
+
+        video_source = ffms2.VideoSource(source_path, 0, index)
+        for time in [0, 1.5, 3.3, 10]:
+            n = track.frame_at_time(time * 1000, closest=True)
+            frame = video_source.get_frame_by_time(time).copy()
+            expected = video_source.get_frame(n)
+            for plane, expected_plane in zip(frame.planes, expected.planes):
+                self.assertTrue((plane == expected_plane).all())
+
+        keyframes = track.keyframes + [len(timecodes)]
+        self.assertEqual(track.prev_keyframe(0), 0)
+        self.assertEqual(track.next_keyframe(0), keyframes[1])
+        self.assertEqual(track.prev_keyframe(keyframes[1] - 1), 0)
+        self.assertEqual(track.next_keyframe(keyframes[-2]), len(timecodes))
+        self.assertEqual(
+            track.prev_keyframe(len(timecodes) - 1), keyframes[-2]
+        )
+        self.assertTrue(
+            (
+                track.prev_keyframe(track.keyframe_array)
+                == track.keyframe_array
+            ).all()
+        )
+
+    def test_get_frames_by_time(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        times = [10, 0.5, 3.3, 0.5, 0]
+        planes = video_source.get_frames_by_time(times)
+        for i, time in enumerate(times):
+            frame = video_source.get_frame_by_time(time)
+            for stacked, plane in zip(planes, frame.planes):
+                self.assertTrue((stacked[i] == plane).all())
+
+    def test_index_cache(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index_cache = ffms2.IndexCache(temp_dir)
+            self.assertIsNone(index_cache.get(source_path))
+            ffms2.set_index_cache(index_cache)
+            try:
+                # Don't share indexes left by other tests
+                gc.collect()
+                video_source = ffms2.VideoSource(source_path)
+                index_file = index_cache.get(source_path)
+                self.assertEqual(video_source.index.index_file, index_file)
+                del video_source
+                gc.collect()
+                video_source = ffms2.VideoSource(source_path)
+                self.assertEqual(video_source.index_origin, "read")
+                self.assertEqual(video_source.index.index_file, index_file)
+                video_source.index.write_stream_info()
+                index_cache.get(source_path)
+                ffms2.Index.read_stream_info(index_file, source_path)
+            finally:
+                ffms2.set_index_cache(None)
+            index_cache.evict(os.path.getsize(index_file))
+            self.assertEqual(os.listdir(temp_dir), [])
+
+    def test_index_registry(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_sources = []
+        threads = [
+            threading.Thread(
+                target=lambda: video_sources.append(
+                    ffms2.VideoSource(source_path)
+                )
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(v.index) for v in video_sources}), 1)
+        audio_source = ffms2.AudioSource(source_path)
+        self.assertIs(ffms2.AudioSource(source_path).index, audio_source.index)
+
+    def test_auto_index_policy(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ffms2.set_index_cache(ffms2.IndexCache(temp_dir))
+            ffms2.set_auto_index_policy(ffms2.AutoIndexPolicy("first", "all"))
+            try:
+                gc.collect()
+                audio_source = ffms2.AudioSource(source_path)
+                self.assertEqual(audio_source.index_origin, "indexed")
+                video_source = ffms2.VideoSource(source_path)
+                self.assertEqual(video_source.index_origin, "shared")
+                self.assertIs(video_source.index, audio_source.index)
+                del audio_source, video_source
+                gc.collect()
+                video_source = ffms2.VideoSource(source_path)
+                self.assertEqual(video_source.index_origin, "read")
+            finally:
+                ffms2.set_index_cache(None)
+                ffms2.set_auto_index_policy(None)
+        with self.assertRaises(ValueError):
+            ffms2.AutoIndexPolicy(audio="second")
+
+    def test_persist_index(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        self.assertTrue(ffms2.AutoIndexPolicy().persist)
+        ffms2.set_auto_index_policy(None)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source_file = shutil.copy(str(source_path), temp_dir)
+            video_source = ffms2.VideoSource(source_file)
+            self.assertEqual(video_source.index_origin, "indexed")
+            index_file = source_file + ffms2.FFINDEX_EXT
+            self.assertEqual(video_source.index.index_file, index_file)
+            del video_source
+            gc.collect()
+            video_source = ffms2.VideoSource(source_file)
+            self.assertEqual(video_source.index_origin, "read")
+            del video_source
+            gc.collect()
+
+    def test_index_many(self):
+        source_path = str(ROOT_DIR / "data/morning rescue.mkv")
+        missing_path = str(ROOT_DIR / "data/missing.mkv")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index_cache = ffms2.IndexCache(temp_dir)
+            results = {
+                r.source_file: r
+                for r in ffms2.index_many(
+                    [source_path, missing_path],
+                    workers=2,
+                    index_cache=index_cache,
+                )
+            }
+            self.assertTrue(results[source_path].indexed)
+            self.assertIsNone(results[source_path].error)
+            self.assertIsNotNone(results[missing_path].error)
+            index = ffms2.Index.read(
+                results[source_path].index_file, source_path
+            )
+            self.assertTrue(len(index.tracks[1].frame_info))
+            (result,) = ffms2.index_many(
+                [source_path], index_cache=index_cache
+            )
+            self.assertFalse(result.indexed)
+
+    def test_aio(self):
+        import asyncio
+
+        import ffms2.aio
+
+        source_path = str(ROOT_DIR / "data/morning rescue.mkv")
+
+        async def run():
+            progress = asyncio.Queue()
+            index = await ffms2.aio.index_async(source_path, progress=progress)
+            events = []
+            while True:
+                event = await progress.get()
+                if event is None:
+                    break
+                events.append(event)
+            self.assertTrue(events)
+
+            task = asyncio.ensure_future(ffms2.aio.index_async(source_path))
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            video_source = await ffms2.aio.VideoSource.open(
+                source_path, 0, index
+            )
+            frames = await asyncio.gather(
+                *(video_source.get_frame_async(n) for n in [0, 10, 20])
+            )
+            self.assertTrue(all(frame.valid for frame in frames))
+            count = 0
+            async for planes in video_source.iter_frames_async(0, 10):
+                count += 1
+            self.assertEqual(count, 10)
+
+            audio_source = await ffms2.aio.AudioSource.open(
+                source_path, 1, index
+            )
+            count = 0
+            async for audio in audio_source.linear_access_async(rate=1):
+                count += 1
+            self.assertEqual(count, len(audio_source.linear_access(rate=1)))
+
+        asyncio.run(run())
+
+    def test_get_audio(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        audio_source = ffms2.AudioSource(source_path)
+        channels = audio_source.properties.Channels
+        audio = audio_source.get_audio(1000, 500)
+        self.assertEqual(audio.shape, (500, channels))
+        self.assertIsNot(audio_source.get_audio(1000, 500), audio)
+        audio_source.init_buffer(500)
+        self.assertTrue((audio_source.get_audio(1000) == audio).all())
+        ring = numpy.zeros((1000, channels), audio_source.sample_type)
+        audio_source.get_audio_into(1000, ring[200:700])
+        self.assertTrue((ring[200:700] == audio).all())
+        flat = numpy.zeros(500 * channels, audio_source.sample_type)
+        audio_source.get_audio_into(1000, memoryview(flat))
+        self.assertTrue((flat.reshape(-1, channels) == audio).all())
+        with self.assertRaises(ValueError):
+            audio_source.get_audio_into(1000, ring[::2])
+
+    def test_linear_access_blocks(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        audio_source = ffms2.AudioSource(source_path)
+        expected = [
+            audio.copy()
+            for audio in audio_source.linear_access(0, 100000, block_size=1)
+        ]
+        sizes = {len(audio) for audio in expected[:-1]}
+        self.assertEqual(sizes, {441})
+        audio_iter = audio_source.linear_access(0, 100000, block_size=44100)
+        chunks = [audio.copy() for audio in audio_iter]
+        self.assertEqual(len(chunks), len(expected))
+        for audio, expected_audio in zip(chunks, expected):
+            self.assertTrue((audio == expected_audio).all())
+
+    def test_linear_access_prefetch(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        audio_source = ffms2.AudioSource(source_path)
+        expected = [
+            audio.copy()
+            for audio in audio_source.linear_access(0, 100000, block_size=4410)
+        ]
+        audio_iter = audio_source.linear_access(
+            0, 100000, block_size=4410, prefetch=2
+        )
+        chunks = [audio.copy() for audio in audio_iter]
+        self.assertEqual(len(chunks), len(expected))
+        for audio, expected_audio in zip(chunks, expected):
+            self.assertTrue((audio == expected_audio).all())
+        audio_iter = iter(
+            audio_source.linear_access(block_size=4410, prefetch=2)
+        )
+        next(audio_iter)
+        audio_iter.close()
+        audio = audio_source.get_audio(0, 441)
+        self.assertTrue((audio == expected[0]).all())
+
+    def test_audio_cache(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        audio_source = ffms2.AudioSource(source_path)
+        cached_source = ffms2.AudioSource(
+            source_path, cache_size=1 << 24, cache_block_size=1000
+        )
+        for start, count in [(1500, 3000), (0, 2000), (4900, 1), (100, 0)]:
+            audio = cached_source.get_audio(start, count)
+            expected = audio_source.get_audio(start, count)
+            self.assertEqual(audio.shape, expected.shape)
+            self.assertTrue((audio == expected).all())
+        misses = cached_source.audio_cache.misses
+        cached_source.get_audio(0, 5000)
+        self.assertEqual(cached_source.audio_cache.misses, misses)
+        self.assertEqual(len(cached_source.audio_cache), 5)
+
+    def test_materialize(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        audio_source = ffms2.AudioSource(source_path)
+        num_samples = audio_source.properties.NumSamples
+        expected = audio_source.get_audio(0, num_samples)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "audio" + ffms2.AUDIO_CACHE_EXT)
+            samples = audio_source.materialize(path)
+            self.assertEqual(samples.shape, expected.shape)
+            self.assertTrue((samples == expected).all())
+            self.assertFalse(samples.flags.writeable)
+            audio = audio_source.get_audio(1000, 500)
+            self.assertTrue(numpy.shares_memory(audio, samples))
+            self.assertTrue((audio == expected[1000:1500]).all())
+            mtime_ns = os.stat(path).st_mtime_ns
+            other_source = ffms2.AudioSource(source_path)
+            other_samples = other_source.materialize(path)
+            self.assertEqual(os.stat(path).st_mtime_ns, mtime_ns)
+            self.assertTrue((other_samples == expected).all())
+            path = os.path.join(temp_dir, "float64" + ffms2.AUDIO_CACHE_EXT)
+            samples = other_source.materialize(path, numpy.float64)
+            self.assertEqual(samples.dtype, numpy.float64)
+            self.assertTrue((samples == expected).all())
+            # Unmap files before removing them
+            del samples, other_samples, audio
+            del audio_source, other_source
+        with self.assertRaises(ValueError):
+            ffms2.AudioSource(source_path).materialize(dtype=numpy.int8)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index_cache = ffms2.IndexCache(temp_dir)
+            ffms2.set_index_cache(index_cache)
+            try:
+                audio_source = ffms2.AudioSource(source_path)
+                samples = audio_source.materialize()
+                self.assertEqual(os.path.dirname(samples.filename), temp_dir)
+                del audio_source, samples
+                gc.collect()
+            finally:
+                ffms2.set_index_cache(None)
+            index_cache.clear()
+            self.assertEqual(os.listdir(temp_dir), [])
+
+    def test_owned_frame_planes(self):
+        source_path = Path(ROOT_DIR / "data/morning rescue.mkv")
+        video_source = ffms2.VideoSource(source_path)
+        planes = video_source.get_frame(5).copy().planes
+        expected = [plane.copy() for plane in planes]
+        gc.collect()
+        for plane, expected_plane in zip(planes, expected):
+            self.assertTrue((plane == expected_plane).all())
+        frames = video_source.get_frames(range(0, 30, 3))
+        cached_source = ffms2.VideoSource(source_path, cache_size=1)
+        cached_frames = cached_source.get_frames(range(0, 30, 3))
+        for a, b in zip(frames, cached_frames):
+            self.assertTrue((a == b).all())
+
 
 if __name__ == "__main__":
     unittest.main()
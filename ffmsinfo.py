@@ -74,7 +74,7 @@ def create_index(indexer, write_index=True, progress=True, msg="Indexing…"):
         ic.done()
     if write_index:
         try:
-            index.write()
+            index.write(stream_info=True)
         except ffms2.Error as e:
             print(e, file=sys.stderr)
     return index
@@ -122,6 +122,11 @@ def main():
                     )
             else:
                 index = create_index(indexer, args.write_index, args.progress)
+            if args.write_index and not index.stream_info:
+                try:
+                    index.write_stream_info()
+                except (ffms2.Error, OSError) as e:
+                    print(e, file=sys.stderr)
 
             print("format =", format_name)
 
@@ -132,47 +137,42 @@ def main():
                 print("{}:".format(n))
                 print("\ttype =", type_name)
                 print("\tcodec =", codec_name)
+                info = index.stream_info.get(n)
                 if type_ == ffms2.FFMS_TYPE_VIDEO:
-                    vsource = ffms2.VideoSource(source_file, n, index)
-                    vprops = vsource.properties
-                    frame = vsource.get_frame(0)
+                    if info is None:
+                        info = ffms2.VideoSource(
+                            source_file, n, index
+                        ).stream_info
                     sar_num, sar_den = (
-                        (vprops.SARNum, vprops.SARDen)
-                        if vprops.SARNum and vprops.SARDen
+                        (info.sar_num, info.sar_den)
+                        if info.sar_num and info.sar_den
                         else (1, 1)
                     )
-                    aspect_ratio = (
-                        frame.EncodedWidth
-                        * sar_num
-                        / sar_den
-                        / frame.EncodedHeight
-                    )
+                    aspect_ratio = info.width * sar_num / sar_den / info.height
                     print(
                         "\tresolution =",
-                        "{}×{}".format(
-                            frame.EncodedWidth, frame.EncodedHeight
-                        ),
+                        "{}×{}".format(info.width, info.height),
                     )
                     print("\taspect ratio =", aspect_ratio)
-                    print(
-                        "\tfps =", vprops.FPSNumerator / vprops.FPSDenominator
-                    )
-                    print("\tduration =", vprops.LastTime)
-                    print("\tnum frames =", vprops.NumFrames)
+                    print("\tfps =", info.fps_num / info.fps_den)
+                    print("\tduration =", info.last_time)
+                    print("\tnum frames =", info.num_frames)
                 elif type_ == ffms2.FFMS_TYPE_AUDIO:
-                    asource = ffms2.AudioSource(source_file, n, index)
-                    aprops = asource.properties
+                    if info is None:
+                        info = ffms2.AudioSource(
+                            source_file, n, index
+                        ).stream_info
                     sample_format_name = (
-                        AUDIO_FORMATS[aprops.SampleFormat]
-                        if 0 <= aprops.SampleFormat < len(AUDIO_FORMATS)
+                        AUDIO_FORMATS[info.sample_format]
+                        if 0 <= info.sample_format < len(AUDIO_FORMATS)
                         else "unknown"
                     )
-                    print("\tsample rate =", aprops.SampleRate),
-                    print("\tbits per sample =", aprops.BitsPerSample)
+                    print("\tsample rate =", info.sample_rate),
+                    print("\tbits per sample =", info.bits_per_sample)
                     print("\tsample format =", sample_format_name)
-                    print("\tnum channels =", aprops.Channels)
-                    print("\tduration =", aprops.LastTime)
-                    print("\tnum samples =", aprops.NumSamples)
+                    print("\tnum channels =", info.channels)
+                    print("\tduration =", info.last_time)
+                    print("\tnum samples =", info.num_samples)
         print()
 
 